@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Shared `cue export` helper for the generator scripts.
+
+Every `cue` run re-evaluates the whole model, so generators ask for all
+the projections they need in one call to cue_export_many.
+"""
+
+import json
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to stdlib json
+    orjson = None
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+
+def _run_cue_export(expr: str) -> subprocess.CompletedProcess:
+    # Raw bytes: the JSON parsers take bytes, so stdout is never decoded
+    return subprocess.run(
+        ["cue", "export", "./model/", "-e", expr],
+        capture_output=True, cwd=str(REPO_ROOT)
+    )
+
+
+def _loads(data: bytes):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def cue_export_many(exprs: list[str]) -> dict[str, dict | list]:
+    """Export several expressions with a single `cue export` invocation.
+
+    The expressions are wrapped in one struct literal ({e0: expr0, e1:
+    expr1, ...}) and split apart after a single JSON parse. If the batched
+    export fails, each expression is re-run in its own concurrent `cue`
+    process so the failing one is reported by name, and the script exits.
+    """
+    exprs = list(dict.fromkeys(exprs))
+    wrapper = "{" + ", ".join(f"e{i}: {e}" for i, e in enumerate(exprs)) + "}"
+    result = _run_cue_export(wrapper)
+    if result.returncode == 0:
+        data = _loads(result.stdout)
+        return {expr: data[f"e{i}"] for i, expr in enumerate(exprs)}
+
+    with ThreadPoolExecutor(max_workers=len(exprs)) as pool:
+        results = list(pool.map(_run_cue_export, exprs))
+    exported = {}
+    for expr, result in zip(exprs, results):
+        if result.returncode != 0:
+            stderr = result.stderr.decode("utf-8", "replace")
+            print(f"ERROR: cue export -e '{expr}' failed:\n{stderr}", file=sys.stderr)
+            sys.exit(1)
+        exported[expr] = _loads(result.stdout)
+    return exported
@@ -15,33 +15,72 @@ Usage:
     python3 generators/to_digest.py --output output/digest.md
 """
 
+import heapq
 import json
-import subprocess
+import os
 import sys
+from collections import deque
 from datetime import date
-from glob import glob
 from pathlib import Path
 
+from cue_export import cue_export_many
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 
+# Markdown table row templates, bound once and applied per row
+_COVERAGE_ROW = "| {label} | {count}/{total} | {bar} {pct}% |".format
+_CANDIDATE_ROW = "| `{symbol}` | {score} | {hpo} | {orph} | {pubs} | {name} |".format
 
-def cue_export(expr: str):
-    result = subprocess.run(
-        ["cue", "export", "./model/", "-e", expr],
-        capture_output=True, text=True, cwd=str(REPO_ROOT)
-    )
-    if result.returncode != 0:
-        return None
-    return json.loads(result.stdout)
+# Coverage bars by decile (0-10 blocks), indexed by pct // 10
+_BARS = tuple("█" * i for i in range(11))
 
 
 def load_snapshots():
+    """Return the two most recent snapshots, oldest first.
+
+    Reads the append-only snapshots.jsonl log written by to_site, keeping
+    and parsing only the tail. Falls back to legacy per-day *.json files.
+    """
     snap_dir = REPO_ROOT / "output" / "snapshots"
-    snapshots = []
-    for snap_file in sorted(snap_dir.glob("*.json")):
-        with open(snap_file) as f:
-            snapshots.append(json.load(f))
-    return snapshots
+    snap_log = snap_dir / "snapshots.jsonl"
+    if snap_log.exists():
+        # Keep only the last two raw lines; older snapshots are never parsed
+        with open(snap_log, "rb") as f:
+            tail = deque((line for line in f if line.strip()), maxlen=2)
+        return [json.loads(line) for line in tail]
+    if not snap_dir.is_dir():
+        return []
+    # Legacy layout: only the two newest <date>.json files are needed
+    with os.scandir(snap_dir) as it:
+        recent = heapq.nlargest(
+            2, (e for e in it if e.name.endswith(".json")), key=lambda e: e.name
+        )
+    return [json.loads(Path(e.path).read_bytes()) for e in reversed(recent)]
+
+
+def sorted_diff(a: list[str], b: list[str]) -> tuple[list[str], list[str]]:
+    """Two-pointer diff of sorted, duplicate-free lists.
+
+    Returns (only_in_a, only_in_b), both still sorted. Snapshots persist
+    gap_symbols and facebase_symbols sorted, so no sets are needed.
+    """
+    if a == b:  # common case: nothing changed between snapshots
+        return [], []
+    only_a, only_b = [], []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            only_a.append(a[i])
+            i += 1
+        elif a[i] > b[j]:
+            only_b.append(b[j])
+            j += 1
+        else:
+            i += 1
+            j += 1
+    only_a.extend(a[i:])
+    only_b.extend(b[j:])
+    return only_a, only_b
 
 
 def build_digest() -> str:
@@ -49,11 +88,9 @@ def build_digest() -> str:
     today = date.today().isoformat()
 
     # Load current model stats
-    gap_report = cue_export("gap_report")
-    sources = cue_export("gene_sources")
-
-    if not gap_report or not sources:
-        return "**Digest failed:** could not export CUE model.\n"
+    exported = cue_export_many(["gap_report", "gene_sources"])
+    gap_report = exported["gap_report"]
+    sources = exported["gene_sources"]
 
     summary = gap_report["summary"]
     total = summary["total"]
@@ -70,11 +107,11 @@ def build_digest() -> str:
         "in_structures": "AlphaFold/PDB",
     }
 
-    source_counts = {}
-    for key in source_labels:
-        source_counts[key] = sum(
-            1 for s in sources.values() if s.get(key, False)
-        )
+    source_counts = dict.fromkeys(source_labels, 0)
+    for flags in sources.values():
+        for key, value in flags.items():
+            if value and key in source_counts:
+                source_counts[key] += 1
 
     # Header
     lines.append(f"## Weekly Pipeline Digest — {today}")
@@ -87,11 +124,16 @@ def build_digest() -> str:
     lines.append("")
     lines.append("| Source | Coverage | % |")
     lines.append("|--------|----------|---|")
-    for key, label in source_labels.items():
-        count = source_counts[key]
-        pct = count * 100 // total if total else 0
-        bar = "█" * (pct // 10)
-        lines.append(f"| {label} | {count}/{total} | {bar} {pct}% |")
+    coverage = [
+        (label, source_counts[key],
+         source_counts[key] * 100 // total if total else 0)
+        for key, label in source_labels.items()
+    ]
+    lines.extend(
+        _COVERAGE_ROW(label=label, count=count, total=total,
+                      bar=_BARS[min(pct, 100) // 10], pct=pct)
+        for label, count, pct in coverage
+    )
     lines.append("")
 
     # Gap summary
@@ -109,15 +151,12 @@ def build_digest() -> str:
     if len(snapshots) >= 2:
         prev = snapshots[-2]
         curr = snapshots[-1]
-        prev_gaps = set(prev.get("gap_symbols", []))
-        curr_gaps = set(curr.get("gap_symbols", []))
-        prev_fb = set(prev.get("facebase_symbols", []))
-        curr_fb = set(curr.get("facebase_symbols", []))
-
-        gaps_closed = sorted(prev_gaps - curr_gaps)
-        gaps_opened = sorted(curr_gaps - prev_gaps)
-        new_fb = sorted(curr_fb - prev_fb)
-        lost_fb = sorted(prev_fb - curr_fb)
+        gaps_closed, gaps_opened = sorted_diff(
+            prev.get("gap_symbols", []), curr.get("gap_symbols", [])
+        )
+        lost_fb, new_fb = sorted_diff(
+            prev.get("facebase_symbols", []), curr.get("facebase_symbols", [])
+        )
 
         lines.append(f"### Changes Since {prev['date']}")
         lines.append("")
@@ -125,22 +164,22 @@ def build_digest() -> str:
         if gaps_closed:
             lines.append(
                 f"**Gaps closed ({len(gaps_closed)}):** "
-                + ", ".join(f"`{g}`" for g in gaps_closed)
+                + ", ".join([f"`{g}`" for g in gaps_closed])
             )
         if gaps_opened:
             lines.append(
                 f"**Gaps opened ({len(gaps_opened)}):** "
-                + ", ".join(f"`{g}`" for g in gaps_opened)
+                + ", ".join([f"`{g}`" for g in gaps_opened])
             )
         if new_fb:
             lines.append(
                 f"**New FaceBase coverage ({len(new_fb)}):** "
-                + ", ".join(f"`{g}`" for g in new_fb)
+                + ", ".join([f"`{g}`" for g in new_fb])
             )
         if lost_fb:
             lines.append(
                 f"**Lost FaceBase coverage ({len(lost_fb)}):** "
-                + ", ".join(f"`{g}`" for g in lost_fb)
+                + ", ".join([f"`{g}`" for g in lost_fb])
             )
         if not (gaps_closed or gaps_opened or new_fb or lost_fb):
             lines.append("No changes detected since last snapshot.")
@@ -166,13 +205,10 @@ def build_digest() -> str:
     # Missing sources (only show sources with gaps)
     lines.append("### Missing Data")
     lines.append("")
-    missing_sources = []
-    for key in sorted(summary.keys()):
-        if key.startswith("missing_") and key.endswith("_count"):
-            count = summary[key]
-            if count > 0:
-                source_name = key.replace("missing_", "").replace("_count", "")
-                missing_sources.append((source_name, count))
+    missing_sources = [
+        (name, count) for name, count in sorted(summary["missing"].items())
+        if count > 0
+    ]
 
     if missing_sources:
         for name, count in sorted(missing_sources, key=lambda x: -x[1]):
@@ -227,25 +263,23 @@ def build_digest() -> str:
         lines.append("")
 
         # Top 10 by confidence score, with enrichment data
-        top = sorted(
-            candidates, key=lambda c: c.get("confidence_score", 0),
-            reverse=True
-        )[:10]
+        top = heapq.nlargest(
+            10, candidates, key=lambda c: c.get("confidence_score", 0)
+        )
 
         if top:
             lines.append("| Gene | Score | HPO | Orphanet | CF Pubs | Name |")
             lines.append("|------|------:|----:|---------:|--------:|------|")
             for c in top:
                 ev = c.get("evidence", {})
-                hpo = ev.get("hpo_phenotype_count", 0)
-                orph = ev.get("orphanet_disorder_count", 0)
-                pubs = cf_pubs.get(c["symbol"], "—")
-                name = c.get("name", "")[:40]
-                score = c.get("confidence_score", 0)
-                lines.append(
-                    f"| `{c['symbol']}` | {score} | {hpo} | {orph} "
-                    f"| {pubs} | {name} |"
-                )
+                lines.append(_CANDIDATE_ROW(
+                    symbol=c["symbol"],
+                    score=c.get("confidence_score", 0),
+                    hpo=ev.get("hpo_phenotype_count", 0),
+                    orph=ev.get("orphanet_disorder_count", 0),
+                    pubs=cf_pubs.get(c["symbol"], "—"),
+                    name=c.get("name", "")[:40],
+                ))
             lines.append("")
 
             if cf_pubs:
@@ -16,229 +16,391 @@ CSS and JS are inlined via Jinja2 {% include %} for single-file output.
 import json
 import os
 import shutil
-import subprocess
 import sys
+from bisect import bisect_left
+from collections import namedtuple
+from dataclasses import dataclass, field, fields
 from datetime import date
-from glob import glob
 from pathlib import Path
 
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    select_autoescape,
+)
+from markupsafe import Markup
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to stdlib json
+    orjson = None
+
+from cue_export import cue_export_many
+
+# One row of the source coverage tables / filter toggles in the templates
+SourceInfo = namedtuple("SourceInfo", "key name url count filter_key")
+
+
+@dataclass(slots=True)
+class GeneRow:
+    """One gene in the gene table (GENE_ROWS in app.js); serialized field by field."""
+    symbol: str
+    go: bool
+    omim: bool
+    hpo: bool
+    uniprot: bool
+    facebase: bool
+    clinvar: bool
+    pubmed: bool
+    gnomad: bool
+    nih_reporter: bool
+    gtex: bool
+    clinicaltrials: bool
+    string: bool
+    orphanet: bool
+    opentargets: bool
+    count: int
+    syndrome: str
+    protein: str
+    pub_total: int
+    pub_recent: int
+    papers: list
+    pathogenic: int
+    phenotype_count: int
+    syndromes: list
+    pli_score: float | None
+    loeuf_score: float | None
+    grant_count: int
+    trial_count: int
+    top_tissues: list
+    nih_projects: list
+    string_partners: list
+    craniofacial_expression: float | None
+    prevalence: str
+    orphanet_disorders: list
+    is_drug_target: bool
+    drug_count: int
+    max_clinical_phase: int
+    opentargets_drugs: list
+    structures: bool
+    has_alphafold: bool
+    alphafold_confidence: float | None
+    pdb_count: int
+    has_experimental_structure: bool
+    models: bool
+    has_mouse_model: bool
+    has_zebrafish_model: bool
+    mouse_model_count: int
+    zebrafish_model_count: int
+    translational_score: int = 0
+    translational_components: list = field(default_factory=list)
+
 
 GENERATOR_DIR = Path(__file__).resolve().parent
 TEMPLATE_DIR = GENERATOR_DIR / "templates"
 STATIC_DIR = GENERATOR_DIR / "static"
+JINJA_CACHE_DIR = GENERATOR_DIR / ".jcache"
+_OUTPUT_DIR = GENERATOR_DIR.parent / "output"
+
+# Write buffer for rendered pages, sized to hold a whole index.html
+_PAGE_WRITE_BUFFER = 4 * 1024 * 1024
+
+# Templates are compiled once per process and the compiled bytecode is
+# kept on disk, so later runs skip Jinja compilation of the pages and the
+# inlined CSS/JS. Static files are searched after the templates so
+# {% include "style.css" %} resolves. main() creates JINJA_CACHE_DIR.
+_ENV = Environment(
+    loader=FileSystemLoader([str(TEMPLATE_DIR), str(STATIC_DIR)]),
+    autoescape=select_autoescape(default_for_string=False, default=False,
+                                  enabled_extensions=("html", "html.j2")),
+    bytecode_cache=FileSystemBytecodeCache(directory=str(JINJA_CACHE_DIR)),
+    auto_reload=False,
+    cache_size=-1,
+)
+
+
+# Display name and homepage for each gene_sources flag, in table order
+_SOURCE_NAMES = {
+    "in_go": "Gene Ontology",
+    "in_omim": "OMIM",
+    "in_hpo": "HPO",
+    "in_uniprot": "UniProt",
+    "in_facebase": "FaceBase",
+    "in_clinvar": "ClinVar",
+    "in_pubmed": "PubMed",
+    "in_gnomad": "gnomAD",
+    "in_nih_reporter": "NIH Reporter",
+    "in_gtex": "GTEx",
+    "in_clinicaltrials": "ClinicalTrials",
+    "in_string": "STRING",
+    "in_orphanet": "Orphanet",
+    "in_opentargets": "Open Targets",
+    "in_structures": "AlphaFold/PDB",
+    "in_models": "MGI/ZFIN",
+}
+_SOURCE_URLS = {
+    "in_go": "http://geneontology.org/",
+    "in_omim": "https://www.omim.org/",
+    "in_hpo": "https://hpo.jax.org/",
+    "in_uniprot": "https://www.uniprot.org/",
+    "in_facebase": "https://www.facebase.org/",
+    "in_clinvar": "https://www.ncbi.nlm.nih.gov/clinvar/",
+    "in_pubmed": "https://pubmed.ncbi.nlm.nih.gov/",
+    "in_gnomad": "https://gnomad.broadinstitute.org/",
+    "in_nih_reporter": "https://reporter.nih.gov/",
+    "in_gtex": "https://gtexportal.org/",
+    "in_clinicaltrials": "https://clinicaltrials.gov/",
+    "in_string": "https://string-db.org/",
+    "in_orphanet": "https://www.orpha.net/",
+    "in_opentargets": "https://platform.opentargets.org/",
+    "in_structures": "https://alphafold.ebi.ac.uk/",
+    "in_models": "https://www.alliancegenome.org/",
+}
+
+# Mapping from source key (in_go) to the gene_rows field name (go)
+_FILTER_KEYS = {
+    "in_go": "go",
+    "in_omim": "omim",
+    "in_hpo": "hpo",
+    "in_uniprot": "uniprot",
+    "in_facebase": "facebase",
+    "in_clinvar": "clinvar",
+    "in_pubmed": "pubmed",
+    "in_gnomad": "gnomad",
+    "in_nih_reporter": "nih_reporter",
+    "in_gtex": "gtex",
+    "in_clinicaltrials": "clinicaltrials",
+    "in_string": "string",
+    "in_orphanet": "orphanet",
+    "in_opentargets": "opentargets",
+    "in_structures": "structures",
+    "in_models": "models",
+}
+
+
+def to_json(obj) -> str:
+    """Serialize a payload for inlining into the page (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, default=_dataclass_fields)
+
+
+def _dataclass_fields(obj) -> dict:
+    # json.dumps fallback for GeneRow (orjson serializes dataclasses natively)
+    return {f.name: getattr(obj, f.name) for f in fields(obj)}
+
+
+def to_script_json(obj) -> Markup:
+    """Serialize a payload for inlining into a <script> block.
+
+    Returned as Markup so Jinja writes the string through unchanged
+    (no escape pass over the large blobs) whatever the autoescape
+    setting of the including template.
+    """
+    return Markup(to_json(obj))
+
+
+def from_json(data: str | bytes):
+    """Parse JSON text or bytes (orjson when available)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def load_snapshot_log(snap_log: Path) -> list[dict]:
+    """Read the snapshot log, one JSON snapshot per line."""
+    with open(snap_log, "rb") as f:
+        return [from_json(line) for line in f if line.strip()]
+
+
+def summarize_vizdata(vizdata: dict) -> tuple[list, int, int]:
+    """Return the legend entries (unique node roles) and node/edge counts."""
+    roles_in_data = {}
+    for node in vizdata['nodes']:
+        data = node['data']
+        role = data['type']
+        if role not in roles_in_data:
+            roles_in_data[role] = {
+                'label': data['role_label'],
+                'color': data['color']
+            }
+    return sorted(roles_in_data.items()), len(vizdata['nodes']), len(vizdata['edges'])
 
 
-def cue_export(expr: str) -> dict | list:
-    result = subprocess.run(
-        ["cue", "export", "./model/", "-e", expr],
-        capture_output=True, text=True
-    )
-    if result.returncode != 0:
-        print(f"ERROR: cue export -e '{expr}' failed:\n{result.stderr}", file=sys.stderr)
-        sys.exit(1)
-    return json.loads(result.stdout)
+def translational_readiness(path_count: int, trials: int, pli: float | None,
+                            cf_exp: float | None, has_syndrome: bool) -> tuple[int, list[str]]:
+    """Score how close a gene is to translational work, with the reasons."""
+    score = 0
+    components = []
+
+    if path_count > 10:
+        score += 3
+        components.append("many pathogenic variants")
+    elif path_count > 0:
+        score += 2
+        components.append("pathogenic variants")
+
+    if trials > 0:
+        score += 3
+        components.append(f"{trials} clinical trial(s)")
+
+    if pli is not None and pli > 0.9:
+        score += 2
+        components.append("highly constrained")
+
+    if cf_exp is not None and cf_exp > 10:
+        score += 2
+        components.append("craniofacial expression")
+
+    if has_syndrome:
+        score += 1
+        components.append("Mendelian syndrome")
+
+    return score, components
+
+
+def hotspot_score(velocity: float, grants: int, has_disease: bool, path_count: int) -> int:
+    """Emerging hotspot score: fast-growing, unfunded, disease-linked genes rank highest."""
+    return (3 * (velocity > 0.4) + 2 * (grants == 0)
+            + 2 * has_disease + (path_count > 0))
 
 
 def main():
     print("to_site: exporting model data...")
-    sources: dict = cue_export("gene_sources")  # type: ignore[assignment]
-    gap: dict = cue_export("gap_report")  # type: ignore[assignment]
-    genes: dict = cue_export("genes")  # type: ignore[assignment]
-    funding: dict = cue_export("funding_gaps")  # type: ignore[assignment]
-
-    # Load vizdata
-    vizdata_path = os.path.join(os.path.dirname(__file__), "..", "output", "vizdata.json")
-    with open(vizdata_path) as f:
-        vizdata = json.load(f)
+    exported = cue_export_many([
+        "gene_sources", "gap_report", "genes",
+        "funding_gaps", "weighted_gaps", "anomalies",
+    ])
+    sources: dict = exported["gene_sources"]  # type: ignore[assignment]
+    gap: dict = exported["gap_report"]  # type: ignore[assignment]
+    genes: dict = exported["genes"]  # type: ignore[assignment]
+    funding: dict = exported["funding_gaps"]  # type: ignore[assignment]
+
+    # Load vizdata. The file is inlined into the page as-is; it is parsed
+    # only for the legend and the stats printout, and the parsed copy is
+    # dropped right away rather than held alongside the raw text.
+    vizdata_raw = (_OUTPUT_DIR / "vizdata.json").read_bytes()
+    legend_items, node_count, edge_count = summarize_vizdata(from_json(vizdata_raw))
 
     total = gap["summary"]["total"]
-    source_names = {
-        "in_go": "Gene Ontology",
-        "in_omim": "OMIM",
-        "in_hpo": "HPO",
-        "in_uniprot": "UniProt",
-        "in_facebase": "FaceBase",
-        "in_clinvar": "ClinVar",
-        "in_pubmed": "PubMed",
-        "in_gnomad": "gnomAD",
-        "in_nih_reporter": "NIH Reporter",
-        "in_gtex": "GTEx",
-        "in_clinicaltrials": "ClinicalTrials",
-        "in_string": "STRING",
-        "in_orphanet": "Orphanet",
-        "in_opentargets": "Open Targets",
-        "in_structures": "AlphaFold/PDB",
-        "in_models": "MGI/ZFIN",
-    }
-    source_urls = {
-        "in_go": "http://geneontology.org/",
-        "in_omim": "https://www.omim.org/",
-        "in_hpo": "https://hpo.jax.org/",
-        "in_uniprot": "https://www.uniprot.org/",
-        "in_facebase": "https://www.facebase.org/",
-        "in_clinvar": "https://www.ncbi.nlm.nih.gov/clinvar/",
-        "in_pubmed": "https://pubmed.ncbi.nlm.nih.gov/",
-        "in_gnomad": "https://gnomad.broadinstitute.org/",
-        "in_nih_reporter": "https://reporter.nih.gov/",
-        "in_gtex": "https://gtexportal.org/",
-        "in_clinicaltrials": "https://clinicaltrials.gov/",
-        "in_string": "https://string-db.org/",
-        "in_orphanet": "https://www.orpha.net/",
-        "in_opentargets": "https://platform.opentargets.org/",
-        "in_structures": "https://alphafold.ebi.ac.uk/",
-        "in_models": "https://www.alliancegenome.org/",
-    }
 
-    # Mapping from source key (in_go) to the gene_rows field name (go)
-    filter_keys = {
-        "in_go": "go",
-        "in_omim": "omim",
-        "in_hpo": "hpo",
-        "in_uniprot": "uniprot",
-        "in_facebase": "facebase",
-        "in_clinvar": "clinvar",
-        "in_pubmed": "pubmed",
-        "in_gnomad": "gnomad",
-        "in_nih_reporter": "nih_reporter",
-        "in_gtex": "gtex",
-        "in_clinicaltrials": "clinicaltrials",
-        "in_string": "string",
-        "in_orphanet": "orphanet",
-        "in_opentargets": "opentargets",
-        "in_structures": "structures",
-        "in_models": "models",
+    source_count = len(_SOURCE_NAMES)
+
+    # Per-source counts: one pass over genes, touching only the flags that
+    # are set. FaceBase membership for the snapshot is collected alongside.
+    source_counts = dict.fromkeys(_SOURCE_NAMES, 0)
+    fb_symbols = []
+    for sym, flags in sources.items():
+        for key, value in flags.items():
+            if value and key in source_counts:
+                source_counts[key] += 1
+        if flags.get("in_facebase", False):
+            fb_symbols.append(sym)
+
+    # Build gene detail rows column-wise: one comprehension per field over
+    # the sorted symbols, then zip the columns into GeneRow records by
+    # field name.
+    syms = sorted(sources)
+    flag_recs = [sources[sym] for sym in syms]
+    gene_recs = [genes[sym] for sym in syms]
+
+    def flag_col(key: str) -> list:
+        return [flags.get(key, False) for flags in flag_recs]
+
+    def gene_col(key: str, default=None) -> list:
+        return [gene.get(key, default) for gene in gene_recs]
+
+    syndromes_col = gene_col("omim_syndromes", [])
+    columns = {
+        "symbol": syms,
+        "go": flag_col("in_go"),
+        "omim": flag_col("in_omim"),
+        "hpo": flag_col("in_hpo"),
+        "uniprot": flag_col("in_uniprot"),
+        "facebase": flag_col("in_facebase"),
+        "clinvar": flag_col("in_clinvar"),
+        "pubmed": flag_col("in_pubmed"),
+        "gnomad": flag_col("in_gnomad"),
+        "nih_reporter": flag_col("in_nih_reporter"),
+        "gtex": flag_col("in_gtex"),
+        "clinicaltrials": flag_col("in_clinicaltrials"),
+        "string": flag_col("in_string"),
+        "orphanet": flag_col("in_orphanet"),
+        "opentargets": flag_col("in_opentargets"),
+        "count": [sum(flags.values()) for flags in flag_recs],
+        "syndrome": [syn[0].split(",")[0] if syn else "" for syn in syndromes_col],
+        "protein": gene_col("protein_name", ""),
+        "pub_total": gene_col("pubmed_total", 0),
+        "pub_recent": gene_col("pubmed_recent", 0),
+        "papers": gene_col("pubmed_papers", []),
+        "pathogenic": gene_col("pathogenic_count", 0),
+        "phenotype_count": [len(p) for p in gene_col("phenotypes", [])],
+        "syndromes": syndromes_col,
+        "pli_score": gene_col("pli_score"),
+        "loeuf_score": gene_col("loeuf_score"),
+        "grant_count": gene_col("active_grant_count", 0),
+        "trial_count": gene_col("active_trial_count", 0),
+        "top_tissues": gene_col("top_tissues", []),
+        "nih_projects": gene_col("nih_reporter_projects", []),
+        "string_partners": gene_col("string_partners", []),
+        "craniofacial_expression": gene_col("craniofacial_expression"),
+        "prevalence": gene_col("orphanet_prevalence", ""),
+        "orphanet_disorders": gene_col("orphanet_disorders", []),
+        "is_drug_target": gene_col("is_drug_target", False),
+        "drug_count": gene_col("drug_count", 0),
+        "max_clinical_phase": gene_col("max_clinical_phase", 0),
+        "opentargets_drugs": gene_col("opentargets_drugs", []),
+        "structures": flag_col("in_structures"),
+        "has_alphafold": gene_col("has_alphafold", False),
+        "alphafold_confidence": gene_col("alphafold_confidence"),
+        "pdb_count": gene_col("pdb_count", 0),
+        "has_experimental_structure": gene_col("has_experimental_structure", False),
+        "models": flag_col("in_models"),
+        "has_mouse_model": gene_col("has_mouse_model", False),
+        "has_zebrafish_model": gene_col("has_zebrafish_model", False),
+        "mouse_model_count": gene_col("mouse_model_count", 0),
+        "zebrafish_model_count": gene_col("zebrafish_model_count", 0),
     }
-
-    source_count = len(source_names)
-
-    # Per-source counts
-    source_counts = {}
-    for key in source_names:
-        source_counts[key] = sum(1 for s in sources.values() if s.get(key, False))
-
-    # Build gene detail rows (all 12 sources)
-    gene_rows = []
-    for sym in sorted(sources.keys()):
-        flags = sources[sym]
-        count = sum(1 for v in flags.values() if v)
-        gene = genes[sym]
-        syndromes = gene.get("omim_syndromes", [])
-        syn_short = syndromes[0].split(",")[0] if syndromes else ""
-        pub_total = gene.get("pubmed_total", 0)
-        pub_recent = gene.get("pubmed_recent", 0)
-        papers = gene.get("pubmed_papers", [])
-        pathogenic = gene.get("pathogenic_count", 0)
-        phenotypes = gene.get("phenotypes", [])
-
-        gene_rows.append({
-            "symbol": sym,
-            "go": flags.get("in_go", False),
-            "omim": flags.get("in_omim", False),
-            "hpo": flags.get("in_hpo", False),
-            "uniprot": flags.get("in_uniprot", False),
-            "facebase": flags.get("in_facebase", False),
-            "clinvar": flags.get("in_clinvar", False),
-            "pubmed": flags.get("in_pubmed", False),
-            "gnomad": flags.get("in_gnomad", False),
-            "nih_reporter": flags.get("in_nih_reporter", False),
-            "gtex": flags.get("in_gtex", False),
-            "clinicaltrials": flags.get("in_clinicaltrials", False),
-            "string": flags.get("in_string", False),
-            "orphanet": flags.get("in_orphanet", False),
-            "opentargets": flags.get("in_opentargets", False),
-            "count": count,
-            "syndrome": syn_short,
-            "protein": gene.get("protein_name", ""),
-            "pub_total": pub_total,
-            "pub_recent": pub_recent,
-            "papers": papers,
-            "pathogenic": pathogenic,
-            "phenotype_count": len(phenotypes),
-            "syndromes": syndromes,
-            "pli_score": gene.get("pli_score", None),
-            "loeuf_score": gene.get("loeuf_score", None),
-            "grant_count": gene.get("active_grant_count", 0),
-            "trial_count": gene.get("active_trial_count", 0),
-            "top_tissues": gene.get("top_tissues", []),
-            "nih_projects": gene.get("nih_reporter_projects", []),
-            "string_partners": gene.get("string_partners", []),
-            "craniofacial_expression": gene.get("craniofacial_expression", None),
-            "prevalence": gene.get("orphanet_prevalence", ""),
-            "orphanet_disorders": gene.get("orphanet_disorders", []),
-            "is_drug_target": gene.get("is_drug_target", False),
-            "drug_count": gene.get("drug_count", 0),
-            "max_clinical_phase": gene.get("max_clinical_phase", 0),
-            "opentargets_drugs": gene.get("opentargets_drugs", []),
-            "structures": flags.get("in_structures", False),
-            "has_alphafold": gene.get("has_alphafold", False),
-            "alphafold_confidence": gene.get("alphafold_confidence", None),
-            "pdb_count": gene.get("pdb_count", 0),
-            "has_experimental_structure": gene.get("has_experimental_structure", False),
-            "models": flags.get("in_models", False),
-            "has_mouse_model": gene.get("has_mouse_model", False),
-            "has_zebrafish_model": gene.get("has_zebrafish_model", False),
-            "mouse_model_count": gene.get("mouse_model_count", 0),
-            "zebrafish_model_count": gene.get("zebrafish_model_count", 0),
-        })
-
-    # Compute translational readiness per gene
-    for entry in gene_rows:
-        sym = entry["symbol"]
-        gene = genes[sym]
-        tr_score = 0
-        tr_components = []
-
-        path_count = gene.get("pathogenic_count", 0) or 0
-        if path_count > 10:
-            tr_score += 3
-            tr_components.append("many pathogenic variants")
-        elif path_count > 0:
-            tr_score += 2
-            tr_components.append("pathogenic variants")
-
-        trials = gene.get("active_trial_count", 0) or 0
-        if trials > 0:
-            tr_score += 3
-            tr_components.append(f"{trials} clinical trial(s)")
-
-        pli = gene.get("pli_score")
-        if pli is not None and pli > 0.9:
-            tr_score += 2
-            tr_components.append("highly constrained")
-
-        cf_exp = gene.get("craniofacial_expression")
-        if cf_exp is not None and cf_exp > 10:
-            tr_score += 2
-            tr_components.append("craniofacial expression")
-
-        if gene.get("omim_syndromes"):
-            tr_score += 1
-            tr_components.append("Mendelian syndrome")
-
-        entry["translational_score"] = tr_score
-        entry["translational_components"] = tr_components
+    gene_rows = [GeneRow(**dict(zip(columns, values)))
+                 for values in zip(*columns.values())]
 
     # Critical gaps from CUE projection
     critical_gaps = funding.get("critical", [])
     funding_summary = funding.get("summary", {})
 
     # Weighted priority scores
-    weighted = cue_export("weighted_gaps")
+    weighted = exported["weighted_gaps"]
 
     # Cross-source anomalies
-    anomalies = cue_export("anomalies")
+    anomalies = exported["anomalies"]
 
-    # === Tier 1 Analytics: Funding Intelligence ===
+    # === Tier 1 Analytics ===
+    # One pass over the sorted genes computes translational readiness
+    # (added to gene_rows for the gene table), funding intelligence and
+    # syndrome-level funding.
     funding_intel = []
-    for sym in sorted(sources.keys()):
-        gene = genes[sym]
-        grants = gene.get("active_grant_count", 0)
-        pubs = gene.get("pubmed_total", 0) or 0
-        recent = gene.get("pubmed_recent", 0) or 0
+    syndrome_funding = {}
+    for entry, flags, gene in zip(gene_rows, flag_recs, gene_recs):
+        sym = entry.symbol
+        gg = gene.get
+        grants = gg("active_grant_count", 0)
+        pubs = gg("pubmed_total", 0) or 0
+        recent = gg("pubmed_recent", 0) or 0
+        path_count = gg("pathogenic_count", 0) or 0
+        trials = gg("active_trial_count", 0) or 0
+        syndromes = gg("omim_syndromes", [])
+
+        # --- Translational readiness ---
+        tr_score, tr_components = translational_readiness(
+            path_count, trials, gg("pli_score"),
+            gg("craniofacial_expression"), bool(syndromes))
+        entry.translational_score = tr_score
+        entry.translational_components = tr_components
+
+        # --- Funding intelligence ---
         velocity = round(recent / pubs, 2) if pubs > 0 else 0
-        has_disease = bool(gene.get("omim_syndromes"))
-        pathogenic = gene.get("pathogenic_count", 0) or 0
+        has_disease = bool(syndromes)
 
         # Funding efficiency: pubs per grant (higher = more productive)
         efficiency = round(pubs / grants, 1) if grants > 0 else None
@@ -247,17 +409,6 @@ def main():
         # Funded but quiet: grants > 0 but few recent pubs
         funded_quiet = grants > 0 and recent < 3
 
-        # Emerging hotspot score
-        hotspot_score = 0
-        if velocity > 0.4:
-            hotspot_score += 3
-        if grants == 0:
-            hotspot_score += 2
-        if has_disease:
-            hotspot_score += 2
-        if pathogenic > 0:
-            hotspot_score += 1
-
         funding_intel.append({
             "symbol": sym,
             "grants": grants,
@@ -267,74 +418,73 @@ def main():
             "efficiency": efficiency,
             "unfunded_momentum": unfunded_momentum,
             "funded_quiet": funded_quiet,
-            "hotspot_score": hotspot_score,
+            "hotspot_score": hotspot_score(velocity, grants, has_disease, path_count),
             "has_disease": has_disease,
         })
 
-    # === Tier 1 Analytics: Syndrome-Level Funding ===
-    syndrome_funding = {}
-    for sym in sorted(sources.keys()):
-        gene = genes[sym]
-        for syn in gene.get("omim_syndromes", []):
-            name = syn.split(",")[0].strip() if "," in syn else syn
-            if name not in syndrome_funding:
-                syndrome_funding[name] = {
+        # --- Syndrome-level funding ---
+        in_facebase = flags.get("in_facebase", False)
+        for syn in syndromes:
+            name = syn.split(",", 1)[0].strip() if "," in syn else syn
+            sf = syndrome_funding.get(name)
+            if sf is None:
+                sf = syndrome_funding[name] = {
                     "name": name, "genes": [], "total_grants": 0,
                     "total_pubs": 0, "total_recent": 0,
                     "fb_count": 0, "trial_count": 0,
                 }
-            sf = syndrome_funding[name]
             sf["genes"].append(sym)
-            sf["total_grants"] += gene.get("active_grant_count", 0)
-            sf["total_pubs"] += gene.get("pubmed_total", 0) or 0
-            sf["total_recent"] += gene.get("pubmed_recent", 0) or 0
-            if sources[sym].get("in_facebase", False):
+            sf["total_grants"] += grants
+            sf["total_pubs"] += pubs
+            sf["total_recent"] += recent
+            if in_facebase:
                 sf["fb_count"] += 1
-            sf["trial_count"] += gene.get("active_trial_count", 0)
-
-    # === Tier 1 Analytics: Translational Readiness ===
-    # Computed per gene_row so it's available in the gene table
-    # (added to gene_rows after they're built below)
+            sf["trial_count"] += gg("active_trial_count", 0)
 
     # === Expanded Pipeline Data (from lacuene-exp, build-time) ===
-    exp_base = Path(os.path.dirname(__file__)).parent.parent / "lacuene-exp"
+    exp_base = GENERATOR_DIR.parent.parent / "lacuene-exp"
     gap_candidates_data = {"candidates": [], "candidate_count": 0}
     expanded_gene_count = 0
     pipeline_status = {}
     try:
         gc_path = exp_base / "derived" / "gap_candidates.json"
         if gc_path.exists():
-            with open(gc_path) as f:
-                gap_candidates_data = json.load(f)
+            gap_candidates_data = from_json(gc_path.read_bytes())
         eg_path = exp_base / "expanded" / "hgnc_craniofacial.json"
         if eg_path.exists():
-            with open(eg_path) as f:
-                expanded_genes_raw = json.load(f)
-                # Filter ZNF like the API does
-                expanded_genes_raw = [g for g in expanded_genes_raw
-                                      if "Zinc fingers C2H2" not in str(g.get("source", ""))]
-                expanded_gene_count = len(expanded_genes_raw)
+            expanded_genes_raw = from_json(eg_path.read_bytes())
+            # Filter ZNF like the API does
+            expanded_genes_raw = [g for g in expanded_genes_raw
+                                  if "Zinc fingers C2H2" not in str(g.get("source", ""))]
+            expanded_gene_count = len(expanded_genes_raw)
         ps_path = exp_base / "derived" / "pipeline_status.json"
         if ps_path.exists():
-            with open(ps_path) as f:
-                pipeline_status = json.load(f)
+            pipeline_status = from_json(ps_path.read_bytes())
     except (json.JSONDecodeError, OSError) as e:
         print(f"  Note: expanded data not available ({e})", file=sys.stderr)
 
-    # Temporal snapshots
-    snap_dir = os.path.join(os.path.dirname(__file__), "..", "output", "snapshots")
-    os.makedirs(snap_dir, exist_ok=True)
+    # Temporal snapshots: append-only JSON Lines log, one snapshot per line
+    snap_dir = _OUTPUT_DIR / "snapshots"
+    snap_dir.mkdir(parents=True, exist_ok=True)
+    snap_log = snap_dir / "snapshots.jsonl"
 
-    # Load existing snapshots
+    # Load existing snapshots (folding in legacy one-file-per-day snapshots
+    # the first time the log is created)
     snapshots = []
-    for snap_file in sorted(glob(os.path.join(snap_dir, "*.json"))):
-        with open(snap_file) as f:
-            snapshots.append(json.load(f))
+    if snap_log.exists():
+        snapshots = load_snapshot_log(snap_log)
+    else:
+        with os.scandir(snap_dir) as it:
+            legacy = sorted((e for e in it if e.name.endswith(".json")),
+                            key=lambda e: e.name)
+        for entry in legacy:
+            with open(entry.path, "rb") as f:
+                snapshots.append(from_json(f.read()))
 
     # Compute current snapshot
     today = date.today().isoformat()
     gap_symbols = sorted([g["symbol"] for g in critical_gaps])
-    fb_symbols = sorted([sym for sym, flags in sources.items() if flags.get("in_facebase", False)])
+    fb_symbols.sort()
     current_snapshot = {
         "date": today,
         "total_genes": total,
@@ -343,95 +493,90 @@ def main():
         "facebase_symbols": fb_symbols,
     }
 
-    # Replace today's entry if exists, else append
-    snapshots = [s for s in snapshots if s["date"] != today]
-    snapshots.append(current_snapshot)
-    snapshots.sort(key=lambda s: s["date"])
-
-    # Collect unique roles from vizdata nodes for dynamic legend
-    roles_in_data = {}
-    for node in vizdata['nodes']:
-        role = node['data']['type']
-        if role not in roles_in_data:
-            roles_in_data[role] = {
-                'label': node['data']['role_label'],
-                'color': node['data']['color']
-            }
-    legend_items = sorted(roles_in_data.items())
+    # Snapshots are kept sorted by date: replace today's entry if it exists,
+    # else insert it in place (normally at the end, i.e. a plain append)
+    dates = [s["date"] for s in snapshots]
+    i = bisect_left(dates, today)
+    if i < len(dates) and dates[i] == today:
+        snapshots[i] = current_snapshot
+    else:
+        snapshots.insert(i, current_snapshot)
+    rewrite_log = not snap_log.exists() or i != len(dates)
 
     critical_count = funding_summary.get("critical_count", 0)
 
-    # Set up Jinja2 environment
-    env = Environment(
-        loader=FileSystemLoader([str(TEMPLATE_DIR), str(STATIC_DIR)]),
-        autoescape=select_autoescape(default_for_string=False, default=False,
-                                      enabled_extensions=("html", "html.j2")),
-    )
-
-    # Render index page
-    index_template = env.get_template("index.html.j2")
-    html = index_template.render(
-        vizdata_json=json.dumps(vizdata),
-        gene_rows_json=json.dumps(gene_rows),
-        critical_gaps_json=json.dumps(critical_gaps),
-        snapshots_json=json.dumps(snapshots),
-        weighted_gaps_json=json.dumps(weighted),
-        anomalies_json=json.dumps(anomalies),
-        funding_intel_json=json.dumps(funding_intel),
-        syndrome_funding_json=json.dumps(list(syndrome_funding.values())),
+    sources_list = [
+        SourceInfo(key, name, _SOURCE_URLS[key], source_counts[key], _FILTER_KEYS[key])
+        for key, name in _SOURCE_NAMES.items()
+    ]
+
+    # Persist current snapshot: append a line, or rewrite the log when
+    # today's entry was replaced or legacy snapshots were folded in
+    if rewrite_log:
+        with open(snap_log, "w") as f:
+            f.writelines(to_json(s) + "\n" for s in snapshots)
+    else:
+        with open(snap_log, "a") as f:
+            f.write(to_json(current_snapshot) + "\n")
+
+    out_dir = _OUTPUT_DIR / "site"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / "index.html"
+    about_path = out_dir / "about.html"
+
+    index_ctx = dict(
+        vizdata_json=Markup(vizdata_raw.decode()),
+        gene_rows_json=to_script_json(gene_rows),
+        critical_gaps_json=to_script_json(critical_gaps),
+        snapshots_json=to_script_json(snapshots),
+        weighted_gaps_json=to_script_json(weighted),
+        anomalies_json=to_script_json(anomalies),
+        funding_intel_json=to_script_json(funding_intel),
+        syndrome_funding_json=to_script_json(list(syndrome_funding.values())),
         total=total,
         source_count=source_count,
-        source_names=source_names,
-        source_urls=source_urls,
-        source_counts=source_counts,
-        filter_keys=filter_keys,
+        sources_list=sources_list,
         gene_rows=gene_rows,
         critical_gaps=critical_gaps,
         critical_count=critical_count,
         funding_summary=funding_summary,
         snapshots=snapshots,
         legend_items=legend_items,
-        gap_candidates_json=json.dumps(gap_candidates_data),
+        gap_candidates_json=to_script_json(gap_candidates_data),
         expanded_gene_count=expanded_gene_count,
-        pipeline_status_json=json.dumps(pipeline_status),
+        pipeline_status_json=to_script_json(pipeline_status),
     )
-
-    # Render about page
-    about_template = env.get_template("about.html.j2")
-    about_html = about_template.render(
+    about_ctx = dict(
         total=total,
         source_count=source_count,
-        source_names=source_names,
-        source_urls=source_urls,
-        source_counts=source_counts,
+        sources_list=sources_list,
         funding_summary=funding_summary,
         critical=critical_count,
         csv_column_count=source_count + 7,  # sources + symbol + pubs + recent + pathogenic + phenotypes + syndrome + count
     )
 
-    out_dir = os.path.join(os.path.dirname(__file__), "..", "output", "site")
-    os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, "index.html")
-    with open(out_path, "w") as f:
-        f.write(html)
-    about_path = os.path.join(out_dir, "about.html")
-    with open(about_path, "w") as f:
-        f.write(about_html)
+    JINJA_CACHE_DIR.mkdir(exist_ok=True)
+    pages = [
+        ("index.html.j2", index_ctx, out_path),
+        ("about.html.j2", about_ctx, about_path),
+    ]
+    for template_name, ctx, path in pages:
+        # Stream UTF-8 chunks into a large binary buffer rather than
+        # materializing the full page (with its inlined JSON) as one
+        # string; a typical page then reaches disk in a single write
+        with open(path, "wb", buffering=_PAGE_WRITE_BUFFER) as f:
+            _ENV.get_template(template_name).stream(**ctx).dump(f, encoding="utf-8")
 
     # Copy CNAME for custom domain
     cname_src = STATIC_DIR / "CNAME"
     if cname_src.exists():
-        shutil.copy2(cname_src, os.path.join(out_dir, "CNAME"))
-
-    # Persist current snapshot
-    snap_path = os.path.join(snap_dir, f"{today}.json")
-    with open(snap_path, "w") as f:
-        json.dump(current_snapshot, f, indent=2)
+        shutil.copy2(cname_src, out_dir / "CNAME")
 
-    print(f"to_site: wrote {os.path.normpath(out_path)}")
-    print(f"  {len(vizdata['nodes'])} nodes, {len(vizdata['edges'])} edges")
+    for _, _, path in pages:
+        print(f"to_site: wrote {path}")
+    print(f"  {node_count} nodes, {edge_count} edges")
     print(f"  {len(critical_gaps)} critical gaps, {total} genes total")
-    print(f"  {len(snapshots)} snapshot(s) in {os.path.normpath(snap_dir)}")
+    print(f"  {len(snapshots)} snapshot(s) in {snap_dir}")
 
 
 if __name__ == "__main__":
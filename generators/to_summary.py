@@ -4,37 +4,20 @@ Summary generator: pretty-prints the unified gene model.
 Runs `cue export` to extract projections and formats a human-readable report.
 """
 
-import json
-import subprocess
 import sys
 
-
-def cue_export(expr: str) -> dict | list:
-    """Run cue export and parse the JSON result."""
-    result = subprocess.run(
-        ["cue", "export", "./model/", "-e", expr],
-        capture_output=True, text=True
-    )
-    if result.returncode != 0:
-        print(f"ERROR: cue export -e '{expr}' failed:\n{result.stderr}", file=sys.stderr)
-        sys.exit(1)
-    return json.loads(result.stdout)
+from cue_export import cue_export_many
 
 
 def main():
-    gap = cue_export("gap_report")
-    sources = cue_export("gene_sources")
-    enrichment = cue_export("enrichment")
+    exported = cue_export_many(["gap_report", "gene_sources", "enrichment"])
+    gap = exported["gap_report"]
+    sources = exported["gene_sources"]
+    enrichment = exported["enrichment"]
 
     summary = gap["summary"]
     total = summary["total"]
 
-    # Count source coverage tiers (now out of 10)
-    tier_counts = {}
-    for sym, flags in sources.items():
-        count = sum(1 for v in flags.values() if v)
-        tier_counts[count] = tier_counts.get(count, 0) + 1
-
     # Per-source coverage
     source_keys = [
         "in_go", "in_omim", "in_hpo", "in_uniprot", "in_facebase",
@@ -42,9 +25,20 @@ def main():
         "in_clinicaltrials", "in_string", "in_orphanet", "in_opentargets",
         "in_models", "in_structures",
     ]
-    source_counts = {}
-    for name in source_keys:
-        source_counts[name] = sum(1 for s in sources.values() if s.get(name, False))
+
+    # Gene x source flag matrix, built once: column sums give per-source
+    # coverage, row sums give each gene's coverage tier
+    syms = sorted(sources)
+    flag_rows = [tuple(sources[sym].get(key, False) for key in source_keys)
+                 for sym in syms]
+    row_counts = [sum(row) for row in flag_rows]
+    source_counts = dict.fromkeys(source_keys, 0)
+    source_counts.update(zip(source_keys, map(sum, zip(*flag_rows))))
+
+    # Coverage tier histogram, indexed by number of sources (a bincount)
+    tier_counts = [0] * (len(source_keys) + 1)
+    for count in row_counts:
+        tier_counts[count] += 1
 
     source_labels = {
         "in_go": "Gene Ontology",
@@ -65,49 +59,50 @@ def main():
         "in_structures": "AlphaFold/PDB",
     }
 
-    print("=" * 60)
-    print("  lacuene: Neural Crest Gene Reconciliation")
-    print("=" * 60)
+    # Build the whole report, then emit it with a single write
+    out = []
+    out.append("=" * 60)
+    out.append("  lacuene: Neural Crest Gene Reconciliation")
+    out.append("=" * 60)
     source_total = len(source_keys)
-    print(f"\n{total} genes unified across {source_total} sources\n")
+    out.append(f"\n{total} genes unified across {source_total} sources\n")
 
-    print("Coverage Tiers:")
-    for tier in sorted(tier_counts.keys(), reverse=True):
+    out.append("Coverage Tiers:")
+    for tier in range(len(tier_counts) - 1, -1, -1):
         count = tier_counts[tier]
+        if not count:
+            continue
         label = "gene" if count == 1 else "genes"
-        print(f"  {tier:2d} sources:  {count:2d} {label}")
+        out.append(f"  {tier:2d} sources:  {count:2d} {label}")
 
-    print("\nSource Coverage:")
+    out.append("\nSource Coverage:")
     for key in source_keys:
         label = source_labels[key]
         count = source_counts[key]
         pct = count * 100 // total
-        print(f"  {label:15s}  {count:2d}/{total} ({pct}%)")
+        out.append(f"  {label:15s}  {count:2d}/{total} ({pct}%)")
 
     # Research gaps
     research_gaps = gap.get("research_gaps", [])
     if research_gaps:
-        print(f"\nResearch Gaps (OMIM disease but no FaceBase data): {len(research_gaps)}")
+        out.append(f"\nResearch Gaps (OMIM disease but no FaceBase data): {len(research_gaps)}")
         for g in research_gaps:
             syndromes = g.get("syndromes", [])
             syn_str = ", ".join(syndromes[:3]) if syndromes else "no syndromes listed"
-            print(f"  {g['symbol']:8s}  {syn_str}")
+            out.append(f"  {g['symbol']:8s}  {syn_str}")
 
     # Per-gene detail table (abbreviated: GO, OMIM, HPO, UniP, FB, CV, PM, gn, NR, GT)
     headers = ["GO", "OMIM", "HPO", "UniP", "FB", "CV", "PM", "gn", "NR", "GT", "CT", "ST", "OR", "OT", "MO", "St"]
     header_line = "  ".join(f"{h:>4s}" for h in headers)
-    print(f"\n{'Symbol':10s} {header_line}  Sources")
-    print("-" * 70)
-    for sym in sorted(sources.keys()):
-        flags = sources[sym]
-        marks = []
-        for key in source_keys:
-            marks.append("Y" if flags.get(key, False) else "-")
-        count = sum(1 for v in flags.values() if v)
-        mark_line = "  ".join(f"{m:>4s}" for m in marks)
-        print(f"  {sym:8s} {mark_line}  {count}/{source_total}")
-
-    print()
+    out.append(f"\n{'Symbol':10s} {header_line}  Sources")
+    out.append("-" * 70)
+    for sym, row, count in zip(syms, flag_rows, row_counts):
+        mark_line = "  ".join(f"{'Y' if flag else '-':>4s}" for flag in row)
+        out.append(f"  {sym:8s} {mark_line}  {count}/{source_total}")
+
+    out.append("")
+
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 if __name__ == "__main__":
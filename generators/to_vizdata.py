@@ -9,10 +9,19 @@ Edges = shared HPO phenotypes, OMIM syndromes, or GO biological process terms.
 import json
 import math
 import os
-import subprocess
 import sys
-from collections import defaultdict
+from collections import Counter
+from itertools import chain, combinations
 from pathlib import Path
+from sys import intern
+from types import MappingProxyType
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to stdlib json
+    orjson = None
+
+from cue_export import cue_export_many
 
 # Import gene metadata for roles and coloring
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "normalizers"))
@@ -20,6 +29,11 @@ from genes import GENES, SYMBOL_TO_ROLE
 
 OUTPUT_PATH = os.path.join(os.path.dirname(__file__), "..", "output", "vizdata.json")
 
+# Shared read-only defaults for missing gene fields / missing genes, so
+# lookups never allocate a fresh empty container per miss
+_EMPTY: tuple = ()
+_EMPTY_GENE = MappingProxyType({})
+
 # Color scheme by developmental role
 ROLE_COLORS = {
     "border_spec": "#58a6ff",    # blue — border specification
@@ -48,32 +62,26 @@ ROLE_LABELS = {
 }
 
 
-def cue_export(expr: str) -> dict | list:
-    """Run cue export and parse the JSON result."""
-    result = subprocess.run(
-        ["cue", "export", "./model/", "-e", expr],
-        capture_output=True, text=True
-    )
-    if result.returncode != 0:
-        print(f"ERROR: cue export -e '{expr}' failed:\n{result.stderr}", file=sys.stderr)
-        sys.exit(1)
-    return json.loads(result.stdout)
-
-
 def build_nodes(sources: dict, genes_data: dict) -> list[dict]:
     """Create Cytoscape.js node objects from gene source data."""
     nodes = []
-    for sym in sorted(sources.keys()):
-        flags = sources[sym]
-        source_count = sum(1 for v in flags.values() if v)
-        role = SYMBOL_TO_ROLE.get(sym, "patterning")
-        color = ROLE_COLORS.get(role, "#999999")
-        gene = genes_data.get(sym, {})
+    # Bind the per-gene lookups locally for the loop
+    nodes_append = nodes.append
+    role_get = SYMBOL_TO_ROLE.get
+    color_get = ROLE_COLORS.get
+    label_get = ROLE_LABELS.get
+    genes_get = genes_data.get
+    log = math.log
+    for sym, flags in sorted(sources.items()):
+        source_count = sum(flags.values())
+        role = role_get(sym, "patterning")
+        color = color_get(role, "#999999")
+        gene = genes_get(sym, _EMPTY_GENE)
         pub_count = gene.get("pubmed_total", 0)
         pub_recent = gene.get("pubmed_recent", 0)
 
         # Size by publication count (log scale, 10-35px range)
-        size = 10 + min(25, math.log(1 + pub_count) * 4)
+        size = 10 + min(25, log(1 + pub_count) * 4)
 
         # Publication trend: recent (last 5 years) as fraction of total
         if pub_count > 0:
@@ -88,12 +96,12 @@ def build_nodes(sources: dict, genes_data: dict) -> list[dict]:
             velocity = 0
             trend = "none"
 
-        nodes.append({
+        nodes_append({
             "data": {
                 "id": sym,
                 "label": sym,
                 "type": role,
-                "role_label": ROLE_LABELS.get(role, role),
+                "role_label": label_get(role, role),
                 "source_count": source_count,
                 "pub_count": pub_count,
                 "pub_recent": pub_recent,
@@ -106,129 +114,141 @@ def build_nodes(sources: dict, genes_data: dict) -> list[dict]:
     return nodes
 
 
-def build_edges(genes_data: dict) -> list[dict]:
-    """Create edges between genes that share HPO phenotypes or OMIM syndromes."""
-    # Index: phenotype -> set of gene symbols
-    phenotype_index: dict[str, set[str]] = defaultdict(set)
-    syndrome_index: dict[str, set[str]] = defaultdict(set)
+def edge_dicts(edges_by_type: dict[str, dict[tuple[str, str], str]]) -> list[dict]:
+    """Materialize Cytoscape.js edge objects from type -> {(source, target): label} maps."""
+    return [
+        {"data": {"source": a, "target": b, "type": t, "label": label}}
+        for t, edges in edges_by_type.items()
+        for (a, b), label in edges.items()
+    ]
+
+
+def bucket_pairs(syms: set[str]):
+    """All (a, b) pairs with a < b from a bucket of gene symbols.
+
+    Two-gene buckets, the most common size, skip the sort and the
+    combinations iterator.
+    """
+    if len(syms) == 2:
+        a, b = syms
+        return ((a, b),) if a < b else ((b, a),)
+    return combinations(sorted(syms), 2)
+
+
+def build_all_edges(genes_data: dict) -> list[dict]:
+    """Create edges between genes that share HPO phenotypes, OMIM syndromes,
+    GO biological process terms, or STRING protein-protein interactions.
+
+    All four indices are built in one pass over the genes (after a quick
+    phenotype count); the pairs are then expanded in phenotype, syndrome,
+    pathway, PPI order.
+    """
+    # Index: term -> set of gene symbols. Most terms belong to a single
+    # gene, so plain dicts filled through bound setdefault methods avoid
+    # defaultdict's __missing__ dispatch on every first insertion
+    phenotype_index: dict[str, set[str]] = {}
+    syndrome_index: dict[str, set[str]] = {}
+    process_index: dict[str, set[str]] = {}
+    pheno_sd = phenotype_index.setdefault
+    syndrome_sd = syndrome_index.setdefault
+    process_sd = process_index.setdefault
+    # (a, b, sym, partner_sym, score) with a < b; labels are only
+    # formatted for the first occurrence of each pair
+    ppi_pairs: list[tuple[str, str, str, str, float]] = []
+    gene_set = set(genes_data.keys())
+
+    # Only phenotypes shared by 2-5 genes make edges (not universal ones);
+    # count them first so singletons never get an index entry. Each gene's
+    # phenotype list is already unique, so the count is the bucket size.
+    pheno_counts = Counter(chain.from_iterable(
+        gene.get("phenotypes", _EMPTY) for gene in genes_data.values()))
 
     for sym, gene in genes_data.items():
+        # Interned symbols let the index sets and pair keys below compare
+        # by identity; partner symbols (JSON values, not keys) are interned
+        # too so they match the same objects
+        sym = intern(sym)
+        gg = gene.get
+
         # HPO phenotypes (top-level clinical terms, not every sub-phenotype)
-        phenotypes = gene.get("phenotypes", [])
-        # Only index the more common/interesting phenotypes to avoid edge explosion
-        for p in phenotypes:
-            phenotype_index[p].add(sym)
+        for p in gg("phenotypes", _EMPTY):
+            if 2 <= pheno_counts[p] <= 5:
+                pheno_sd(p, set()).add(sym)
 
         # OMIM syndromes
-        syndromes = gene.get("omim_syndromes", [])
-        for s in syndromes:
+        for s in gg("omim_syndromes", _EMPTY):
             # Strip MIM number for matching: "Crouzon syndrome, 123500" -> "Crouzon syndrome"
             name = s.split(",")[0].strip() if "," in s else s
-            syndrome_index[name].add(sym)
+            syndrome_sd(name, set()).add(sym)
 
-    edges = []
-    edge_set = set()  # deduplicate
+        # GO biological process terms
+        for term in gg("go_terms", _EMPTY):
+            if term.get("aspect") == "P":
+                name = term.get("term_name", "")
+                if name:
+                    process_sd(name, set()).add(sym)
 
-    # Shared phenotype edges (only phenotypes shared by 2-5 genes — not universal ones)
+        # STRING interaction partners within the gene set: map each partner
+        # to its (first) score, then keep those in gene_set with one set
+        # intersection, visited in sorted order for a stable edge order
+        partners = gg("string_partners", _EMPTY)
+        if not partners:
+            continue
+        partner_scores: dict[str, float] = {}
+        for partner in partners:
+            if isinstance(partner, str):
+                partner_scores.setdefault(partner, 0)
+            else:
+                partner_scores.setdefault(partner.get("symbol", ""), partner.get("score", 0))
+        for partner_sym in sorted(partner_scores.keys() & gene_set):
+            score = partner_scores[partner_sym]
+            partner_sym = intern(partner_sym)
+            if sym < partner_sym:
+                ppi_pairs.append((sym, partner_sym, sym, partner_sym, score))
+            else:
+                ppi_pairs.append((partner_sym, sym, sym, partner_sym, score))
+
+    # type -> {(source, target): label}; the first label seen for a pair
+    # wins. Keeping one map per type lets the dedup key be the bare pair.
+    # Pair enumeration stays in itertools.combinations (C) with one dict
+    # probe per pair: bucket sizes are capped (phenotype <= 5, pathway
+    # <= 8), so a compiled kernel would spend more on encoding symbols to
+    # ints and back than it could save here.
+    edges_by_type: dict[str, dict[tuple[str, str], str]] = {
+        "shared_phenotype": {},
+        "shared_syndrome": {},
+        "shared_pathway": {},
+        "ppi": {},
+    }
+
+    # Shared phenotype edges (index is pre-filtered to 2-5 genes)
+    add = edges_by_type["shared_phenotype"].setdefault
     for phenotype, syms in phenotype_index.items():
-        if 2 <= len(syms) <= 5:
-            sym_list = sorted(syms)
-            for i in range(len(sym_list)):
-                for j in range(i + 1, len(sym_list)):
-                    key = (sym_list[i], sym_list[j], "shared_phenotype")
-                    if key not in edge_set:
-                        edge_set.add(key)
-                        edges.append({
-                            "data": {
-                                "source": sym_list[i],
-                                "target": sym_list[j],
-                                "type": "shared_phenotype",
-                                "label": phenotype,
-                            }
-                        })
+        for pair in bucket_pairs(syms):
+            add(pair, phenotype)
 
     # Shared syndrome edges
+    add = edges_by_type["shared_syndrome"].setdefault
     for syndrome, syms in syndrome_index.items():
         if len(syms) >= 2:
-            sym_list = sorted(syms)
-            for i in range(len(sym_list)):
-                for j in range(i + 1, len(sym_list)):
-                    key = (sym_list[i], sym_list[j], "shared_syndrome")
-                    if key not in edge_set:
-                        edge_set.add(key)
-                        edges.append({
-                            "data": {
-                                "source": sym_list[i],
-                                "target": sym_list[j],
-                                "type": "shared_syndrome",
-                                "label": syndrome,
-                            }
-                        })
-
-    return edges
-
-
-def build_pathway_edges(genes_data: dict) -> list[dict]:
-    """Create edges between genes sharing GO biological process terms."""
-    process_index: dict[str, set[str]] = defaultdict(set)
-    for sym, gene in genes_data.items():
-        for term in gene.get("go_terms", []):
-            if term.get("aspect") == "P":
-                name = term.get("term_name", "")
-                if name:
-                    process_index[name].add(sym)
+            for pair in bucket_pairs(syms):
+                add(pair, syndrome)
 
-    edges = []
-    edge_set = set()
+    # Shared pathway edges (GO processes shared by 2-8 genes)
+    add = edges_by_type["shared_pathway"].setdefault
     for process, syms in process_index.items():
         if 2 <= len(syms) <= 8:
-            sym_list = sorted(syms)
-            for i in range(len(sym_list)):
-                for j in range(i + 1, len(sym_list)):
-                    key = (sym_list[i], sym_list[j], "shared_pathway")
-                    if key not in edge_set:
-                        edge_set.add(key)
-                        edges.append({
-                            "data": {
-                                "source": sym_list[i],
-                                "target": sym_list[j],
-                                "type": "shared_pathway",
-                                "label": process,
-                            }
-                        })
-    return edges
-
-
-def build_ppi_edges(genes_data: dict) -> list[dict]:
-    """Create edges between genes with STRING protein-protein interactions."""
-    gene_set = set(genes_data.keys())
-    edges = []
-    edge_set = set()
+            for pair in bucket_pairs(syms):
+                add(pair, process)
 
-    for sym, gene in genes_data.items():
-        partners = gene.get("string_partners", [])
-        if not partners:
-            continue
-        for partner in partners:
-            partner_sym = partner if isinstance(partner, str) else partner.get("symbol", "")
-            if not partner_sym or partner_sym not in gene_set:
-                continue
-            key = tuple(sorted([sym, partner_sym]) + ["ppi"])
-            if key not in edge_set:
-                edge_set.add(key)
-                score = partner.get("score", 0) if isinstance(partner, dict) else 0
-                label = f"{sym}-{partner_sym}"
-                if score:
-                    label += f" ({score})"
-                edges.append({
-                    "data": {
-                        "source": sorted([sym, partner_sym])[0],
-                        "target": sorted([sym, partner_sym])[1],
-                        "type": "ppi",
-                        "label": label,
-                    }
-                })
-    return edges
+    # Protein-protein interaction edges
+    ppi_edges = edges_by_type["ppi"]
+    for a, b, sym, partner_sym, score in ppi_pairs:
+        if (a, b) not in ppi_edges:
+            ppi_edges[a, b] = (f"{sym}-{partner_sym} ({score})" if score
+                               else f"{sym}-{partner_sym}")
+
+    return edge_dicts(edges_by_type)
 
 
 def load_expanded_genes(curated_symbols: set[str]) -> list[dict]:
@@ -279,17 +299,14 @@ def load_expanded_genes(curated_symbols: set[str]) -> list[dict]:
 
 def main():
     print("to_vizdata: exporting model data...")
-    sources = cue_export("gene_sources")
-    genes_data = cue_export("genes")
+    exported = cue_export_many(["gene_sources", "genes"])
+    sources = exported["gene_sources"]
+    genes_data = exported["genes"]
 
     print(f"to_vizdata: building graph for {len(sources)} genes...")
     nodes = build_nodes(sources, genes_data)
     curated_count = len(nodes)
-    edges = build_edges(genes_data)
-    pathway_edges = build_pathway_edges(genes_data)
-    ppi_edges = build_ppi_edges(genes_data)
-    edges.extend(pathway_edges)
-    edges.extend(ppi_edges)
+    edges = build_all_edges(genes_data)
 
     # Load expanded-tier genes from lacuene-exp (optional, no edges)
     curated_symbols = set(sources.keys())
@@ -316,18 +333,21 @@ def main():
 
     output = os.path.normpath(OUTPUT_PATH)
     os.makedirs(os.path.dirname(output), exist_ok=True)
-    with open(output, "w") as f:
-        json.dump(vizdata, f, indent=2)
+    # Compact: to_site inlines this file into the page verbatim
+    if orjson is not None:
+        payload = orjson.dumps(vizdata)
+    else:
+        payload = json.dumps(vizdata, separators=(",", ":")).encode()
+    with open(output, "wb") as f:
+        f.write(payload)
 
     print(f"to_vizdata: wrote {output}")
     print(f"  {len(nodes)} nodes ({curated_count} curated, {len(expanded_nodes)} expanded), {len(edges)} edges")
 
     # Print edge type breakdown
-    pheno_edges = sum(1 for e in edges if e["data"]["type"] == "shared_phenotype")
-    syn_edges = sum(1 for e in edges if e["data"]["type"] == "shared_syndrome")
-    path_edges = sum(1 for e in edges if e["data"]["type"] == "shared_pathway")
-    ppi_count = sum(1 for e in edges if e["data"]["type"] == "ppi")
-    print(f"  {pheno_edges} phenotype, {syn_edges} syndrome, {path_edges} pathway, {ppi_count} PPI edges")
+    by_type = Counter(e["data"]["type"] for e in edges)
+    print(f"  {by_type['shared_phenotype']} phenotype, {by_type['shared_syndrome']} syndrome, "
+          f"{by_type['shared_pathway']} pathway, {by_type['ppi']} PPI edges")
 
 
 if __name__ == "__main__":
@@ -48,6 +48,27 @@ gap_report: {
 		missing_opentargets_count:      len(missing_opentargets)
 		missing_models_count:           len(missing_models)
 		missing_structures_count:       len(missing_structures)
+
+		// Same counts keyed by source name, for consumers that iterate
+		// over sources rather than parsing the missing_*_count labels.
+		missing: {
+			"go":              len(missing_go)
+			"omim":            len(missing_omim)
+			"hpo":             len(missing_hpo)
+			"uniprot":         len(missing_uniprot)
+			"facebase":        len(missing_facebase)
+			"clinvar":         len(missing_clinvar)
+			"pubmed":          len(missing_pubmed)
+			"gnomad":          len(missing_gnomad)
+			"nih_reporter":    len(missing_nih_reporter)
+			"gtex":            len(missing_gtex)
+			"clinicaltrials":  len(missing_clinicaltrials)
+			"string":          len(missing_string)
+			"orphanet":        len(missing_orphanet)
+			"opentargets":     len(missing_opentargets)
+			"models":          len(missing_models)
+			"structures":      len(missing_structures)
+		}
 	}
 
 	// Key research gap: known disease genes with no experimental coverage at NIDCR.
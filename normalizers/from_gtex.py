@@ -13,57 +13,124 @@ Usage:
     python3 normalizers/from_gtex.py
 """
 
+import heapq
+import io
 import json
 import sys
-import time
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to stdlib json
+    orjson = None
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(REPO_ROOT / "normalizers"))
 
-from genes import GENES
+from genes import GENES, SORTED_SYMBOLS
 from pipeline import PipelineReport, escape_cue_string
-from utils import fetch_json_with_retry
+from utils import (
+    RateLimiter, fetch_json_with_retry, post_json_with_retry, save_cache_if_dirty, write_atomic,
+)
 
 CACHE_DIR = REPO_ROOT / "data" / "gtex"
 CACHE_FILE = CACHE_DIR / "gtex_cache.json"
+ENSEMBL_CACHE_FILE = CACHE_DIR / "ensembl_ids.json"  # symbol -> Ensembl gene ID
 OUTPUT_FILE = REPO_ROOT / "model" / "gtex.cue"
 
-# MyGene.info: symbol -> Ensembl gene ID
-MYGENE_URL = "https://mygene.info/v3/query?q=symbol:{symbol}&species=human&fields=ensembl.gene"
+# MyGene.info batch query: many symbols in one POST
+MYGENE_BATCH_URL = "https://mygene.info/v3/query"
+
+_quote = urllib.parse.quote
+
+
+def _mygene_url(symbol: str) -> str:
+    """MyGene.info: symbol -> Ensembl gene ID."""
+    return f"https://mygene.info/v3/query?q=symbol:{_quote(symbol)}&species=human&fields=ensembl.gene"
+
+
+def _gtex_url(ensembl_id: str) -> str:
+    """GTEx Portal API v2: median gene expression by tissue."""
+    return ("https://gtexportal.org/api/v2/expression/medianGeneExpression"
+            f"?gencodeId={_quote(ensembl_id)}&datasetId=gtex_v8")
 
-# GTEx Portal API v2: median gene expression by tissue
-GTEX_EXPRESSION_URL = (
-    "https://gtexportal.org/api/v2/expression/medianGeneExpression"
-    "?gencodeId={ensembl_id}&datasetId=gtex_v8"
-)
 
-REQUEST_DELAY = 0.5  # seconds between requests
+# Sent with every MyGene.info and GTEx call; the connections come from the
+# shared keep-alive session in utils
+HEADERS = {"Accept": "application/json", "User-Agent": "lacuene-gtex/1.0"}
+
+# Per-host request pacing shared by all worker threads
+GTEX_LIMITER = RateLimiter(2.0)
+MYGENE_LIMITER = RateLimiter(5.0)
+MAX_WORKERS = 6  # concurrent gene queries (pacing is up to the limiters)
 
 # Tissues used to compute craniofacial_expression (average of available)
-CRANIOFACIAL_TISSUES = {
+CRANIOFACIAL_TISSUES = frozenset({
     "Minor Salivary Gland",
     "Nerve - Tibial",
     "Skin - Sun Exposed (Lower leg)",
     "Brain - Cerebellum",
     "Brain - Cortex",
-}
+})
+
+
+@dataclass(slots=True)
+class Tissue:
+    tissue: str
+    median_tpm: float
+
+
+@dataclass(slots=True)
+class GtexResult:
+    """Per-gene GTEx result, as cached and written to CUE."""
+    ensembl_id: str
+    top_tissues: list[Tissue] = field(default_factory=list)
+    craniofacial_expression: float = 0.0
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "GtexResult":
+        return cls(
+            d["ensembl_id"],
+            [Tissue(t["tissue"], t["median_tpm"]) for t in d.get("top_tissues", ())],
+            d["craniofacial_expression"],
+        )
+
 
+def _dataclass_fields(obj) -> dict:
+    # Serialize Tissue/GtexResult as plain dicts so OPT_SORT_KEYS / sort_keys
+    # order their keys like the rest of the cache
+    return {f.name: getattr(obj, f.name) for f in fields(obj)}
 
-def fetch_json(url: str) -> dict | None:
+
+def fetch_json(url: str, limiter: RateLimiter) -> dict | None:
     """Fetch a URL and return parsed JSON, or None on failure."""
+    limiter.acquire()
+    try:
+        return fetch_json_with_retry(url, headers=HEADERS)
+    except Exception as e:
+        print(f"  WARNING: request failed: {e}", file=sys.stderr)
+        return None
+
+
+def post_json(url: str, body: dict, limiter: RateLimiter) -> dict | list | None:
+    """POST a JSON body and return parsed JSON, or None on failure."""
+    limiter.acquire()
     try:
-        return fetch_json_with_retry(url, headers={"Accept": "application/json"})
+        return post_json_with_retry(url, json_body=body, headers=HEADERS)
     except Exception as e:
         print(f"  WARNING: request failed: {e}", file=sys.stderr)
         return None
 
 
+@lru_cache(maxsize=None)
 def resolve_ensembl_id(symbol: str) -> str | None:
     """Resolve HGNC symbol to Ensembl gene ID via MyGene.info."""
-    url = MYGENE_URL.format(symbol=urllib.parse.quote(symbol))
-    data = fetch_json(url)
+    url = _mygene_url(symbol)
+    data = fetch_json(url, MYGENE_LIMITER)
     if data is None:
         return None
 
@@ -72,7 +139,45 @@ def resolve_ensembl_id(symbol: str) -> str | None:
         return None
 
     # Take the top hit
-    hit = hits[0]
+    return ensembl_gene_id(hits[0])
+
+
+def resolve_ensembl_ids_batch(symbols: list[str]) -> dict[str, str]:
+    """
+    Resolve many HGNC symbols to Ensembl gene IDs with one MyGene.info
+    POST. Returns {symbol: ensembl_id} for the symbols that resolved
+    (empty on failure).
+    """
+    if not symbols:
+        return {}
+    data = post_json(MYGENE_BATCH_URL, {
+        "q": ",".join(symbols),
+        "scopes": "symbol",
+        "species": "human",
+        "fields": "ensembl.gene",
+    }, MYGENE_LIMITER)
+    if not isinstance(data, list):
+        return {}
+
+    resolved = {}
+    seen = set()
+    for hit in data:
+        symbol = hit.get("query", "")
+        # Hits come back grouped by query, best first: only the top hit
+        # counts, as in resolve_ensembl_id
+        if symbol in seen:
+            continue
+        seen.add(symbol)
+        if hit.get("notfound"):
+            continue
+        gene_id = ensembl_gene_id(hit)
+        if gene_id:
+            resolved[symbol] = gene_id
+    return resolved
+
+
+def ensembl_gene_id(hit: dict) -> str | None:
+    """Extract an ENSG gene ID from a MyGene.info hit."""
     ensembl = hit.get("ensembl", {})
 
     # ensembl can be a list (multiple transcripts) or a dict
@@ -87,157 +192,174 @@ def resolve_ensembl_id(symbol: str) -> str | None:
     return None
 
 
-def query_gtex_expression(ensembl_id: str) -> list[dict] | None:
+def query_gtex_expression(ensembl_id: str) -> list[Tissue] | None:
     """
     Query GTEx Portal for median gene expression. Returns list of
-    {tissue, median_tpm} dicts, or None on failure.
+    Tissue(tissue, median_tpm), or None on failure.
 
-    Tries unversioned Ensembl ID first, then falls back to versioned.
+    Tries unversioned Ensembl ID first, then falls back to versioned if
+    that request failed. A successful response with no expression rows
+    means the gene has no data; it is not retried.
     """
     # Try unversioned first
-    url = GTEX_EXPRESSION_URL.format(ensembl_id=urllib.parse.quote(ensembl_id))
-    data = fetch_json(url)
-
-    # Check if we got valid expression data
-    expression_data = None
-    if data is not None:
-        expression_data = data.get("data", [])
-        if not expression_data:
-            expression_data = None
+    url = _gtex_url(ensembl_id)
+    data = fetch_json(url, GTEX_LIMITER)
 
     # If unversioned failed, try with a version suffix
-    if expression_data is None:
-        time.sleep(REQUEST_DELAY)
+    if data is None:
         versioned_id = f"{ensembl_id}.1"
-        url = GTEX_EXPRESSION_URL.format(ensembl_id=urllib.parse.quote(versioned_id))
-        data = fetch_json(url)
-        if data is not None:
-            expression_data = data.get("data", [])
-            if not expression_data:
-                expression_data = None
-
-    if expression_data is None:
+        url = _gtex_url(versioned_id)
+        data = fetch_json(url, GTEX_LIMITER)
+
+    if data is None:
+        return None
+    expression_data = data.get("data", [])
+    if not expression_data:
         return None
 
     tissues = []
+    append = tissues.append
     for entry in expression_data:
-        tissue_name = entry.get("tissueSiteDetailId", "") or entry.get("tissueId", "")
-        # GTEx API may use tissueSiteDetailId or a description field
-        tissue_desc = entry.get("tissueSiteDetail", tissue_name)
-        median_tpm = entry.get("median", 0.0)
-        if tissue_desc and median_tpm is not None:
-            tissues.append({
-                "tissue": tissue_desc,
-                "median_tpm": round(float(median_tpm), 2),
-            })
+        get = entry.get
+        # GTEx API may use a description field or tissueSiteDetailId/tissueId
+        name = get("tissueSiteDetail") or get("tissueSiteDetailId") or get("tissueId")
+        median_tpm = get("median", 0.0)
+        if name and median_tpm is not None:
+            append(Tissue(name, round(float(median_tpm), 2)))
 
     return tissues
 
 
-def extract_top_tissues(tissues: list[dict], n: int = 5) -> list[dict]:
-    """Return the top N tissues by median TPM."""
-    sorted_tissues = sorted(tissues, key=lambda t: t["median_tpm"], reverse=True)
-    return sorted_tissues[:n]
-
-
-def compute_craniofacial_expression(tissues: list[dict]) -> float:
+def summarize_tissues(tissues: list[Tissue], n: int = 5,
+                      cranio_set: frozenset = CRANIOFACIAL_TISSUES) -> tuple[list[Tissue], float]:
     """
-    Compute average TPM across craniofacial-relevant tissues.
-    Uses whichever of CRANIOFACIAL_TISSUES are present in the data.
+    Return (top N tissues by median TPM, craniofacial_expression) in one
+    pass. craniofacial_expression is the average TPM across whichever of
+    CRANIOFACIAL_TISSUES are present in the data.
     """
-    relevant = [t for t in tissues if t["tissue"] in CRANIOFACIAL_TISSUES]
-    if not relevant:
-        return 0.0
-    avg = sum(t["median_tpm"] for t in relevant) / len(relevant)
-    return round(avg, 2)
-
-
-def query_gene(symbol: str) -> dict | None:
+    # Min-heap of (tpm, -index, tissue): the root is the entry to evict, and
+    # the index tiebreak keeps the earlier of equal-TPM tissues, as a
+    # stable sort would
+    top = []
+    cranio_sum = 0.0
+    cranio_count = 0
+    for i, t in enumerate(tissues):
+        tpm = t.median_tpm
+        if len(top) < n:
+            heapq.heappush(top, (tpm, -i, t))
+        elif (tpm, -i) > top[0][:2]:
+            heapq.heapreplace(top, (tpm, -i, t))
+        if t.tissue in cranio_set:
+            cranio_sum += tpm
+            cranio_count += 1
+    top.sort(reverse=True)
+    cranio = round(cranio_sum / cranio_count, 2) if cranio_count else 0.0
+    return [t for _, _, t in top], cranio
+
+
+def query_gene(symbol: str, ensembl_id: str | None = None) -> GtexResult | None:
     """
-    Full pipeline for one gene: resolve Ensembl ID, query GTEx expression.
-    Returns dict with ensembl_id, top_tissues, craniofacial_expression,
-    or a partial dict with just ensembl_id if expression lookup fails,
+    Full pipeline for one gene: resolve Ensembl ID (unless already
+    resolved by the batch lookup), query GTEx expression.
+    Returns a GtexResult, with no tissues if expression lookup fails,
     or None if even Ensembl resolution fails.
     """
-    ensembl_id = resolve_ensembl_id(symbol)
     if ensembl_id is None:
-        return None
-
-    time.sleep(REQUEST_DELAY)
+        ensembl_id = resolve_ensembl_id(symbol)
+        if ensembl_id is None:
+            return None
 
     tissues = query_gtex_expression(ensembl_id)
     if tissues is None or len(tissues) == 0:
         # Partial result: we know the Ensembl ID but have no expression data
-        return {
-            "ensembl_id": ensembl_id,
-            "top_tissues": [],
-            "craniofacial_expression": 0.0,
-        }
-
-    top = extract_top_tissues(tissues)
-    cranio = compute_craniofacial_expression(tissues)
+        return GtexResult(ensembl_id)
 
-    return {
-        "ensembl_id": ensembl_id,
-        "top_tissues": top,
-        "craniofacial_expression": cranio,
-    }
+    top, cranio = summarize_tissues(tissues)
+    return GtexResult(ensembl_id, top, cranio)
 
 
-def load_cache() -> dict:
+def load_cache() -> dict[str, GtexResult]:
     """Load cached GTEx data if available."""
     if CACHE_FILE.exists():
-        with open(CACHE_FILE) as f:
-            return json.load(f)
+        data = CACHE_FILE.read_bytes()
+        raw = orjson.loads(data) if orjson is not None else json.loads(data)
+        return {symbol: GtexResult.from_dict(d) for symbol, d in raw.items()}
     return {}
 
 
-def save_cache(cache: dict) -> None:
+def save_cache(cache: dict[str, GtexResult]) -> None:
     """Persist the GTEx cache to disk."""
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2, sort_keys=True)
+    if orjson is not None:
+        payload = orjson.dumps(cache, default=_dataclass_fields, option=(
+            orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS))
+    else:
+        payload = json.dumps(cache, indent=2, sort_keys=True, default=_dataclass_fields).encode()
+    write_atomic(CACHE_FILE, payload)
     print(f"  cached: {CACHE_FILE}")
 
 
-def generate_cue(gtex_data: dict) -> str:
-    """Generate CUE source from GTEx data, keyed by HGNC symbol."""
+def load_ensembl_cache() -> dict[str, str]:
+    """Load previously resolved symbol -> Ensembl ID mappings."""
+    if ENSEMBL_CACHE_FILE.exists():
+        data = ENSEMBL_CACHE_FILE.read_bytes()
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    return {}
+
+
+def save_ensembl_cache(ensembl_ids: dict[str, str]) -> None:
+    """Persist resolved Ensembl IDs so forced rebuilds skip MyGene.info."""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    if orjson is not None:
+        payload = orjson.dumps(ensembl_ids, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)
+    else:
+        payload = json.dumps(ensembl_ids, indent=2, sort_keys=True).encode()
+    write_atomic(ENSEMBL_CACHE_FILE, payload)
+
+
+def write_cue(fp, gtex_data: dict[str, GtexResult]) -> None:
+    """Write CUE source for GTEx data, keyed by HGNC symbol, to fp."""
     gene_count = len(gtex_data)
-    lines = [
-        "package lacuene",
-        "",
-        "// GTEx: tissue expression data for neural crest genes.",
-        "// Source: GTEx Portal API v2 + MyGene.info (Ensembl ID resolution)",
-        f"// Generated by normalizers/from_gtex.py -- {gene_count} genes",
-        "",
-        "genes: {",
-    ]
-
-    for symbol in sorted(gtex_data.keys()):
+    w = fp.write
+    esc = escape_cue_string
+    w("package lacuene\n"
+      "\n"
+      "// GTEx: tissue expression data for neural crest genes.\n"
+      "// Source: GTEx Portal API v2 + MyGene.info (Ensembl ID resolution)\n"
+      f"// Generated by normalizers/from_gtex.py -- {gene_count} genes\n"
+      "\n"
+      "genes: {\n")
+
+    # gtex_data normally holds only GENES symbols: reuse their sorted order
+    symbols = [s for s in SORTED_SYMBOLS if s in gtex_data]
+    if len(symbols) != gene_count:
+        symbols = sorted(gtex_data)
+
+    for symbol in symbols:
         entry = gtex_data[symbol]
-        ensembl_id = escape_cue_string(entry["ensembl_id"])
-        cranio = entry["craniofacial_expression"]
-        top_tissues = entry.get("top_tissues", [])
+        top_tissues = entry.top_tissues
 
-        lines.append(f'\t"{symbol}": {{')
-        lines.append(f"\t\t_in_gtex:  true")
-        lines.append(f'\t\tgtex_id:   "{ensembl_id}"')
-        lines.append(f"\t\tcraniofacial_expression: {cranio}")
+        w(f'\t"{symbol}": {{\n'
+          f"\t\t_in_gtex:  true\n"
+          f'\t\tgtex_id:   "{esc(entry.ensembl_id)}"\n'
+          f"\t\tcraniofacial_expression: {entry.craniofacial_expression}\n")
 
         if top_tissues:
-            lines.append(f"\t\ttop_tissues: [")
+            w("\t\ttop_tissues: [\n")
             for t in top_tissues:
-                tissue = escape_cue_string(t["tissue"])
-                tpm = t["median_tpm"]
-                lines.append(f'\t\t\t{{tissue: "{tissue}", median_tpm: {tpm}}},')
-            lines.append(f"\t\t]")
+                w(f'\t\t\t{{tissue: "{esc(t.tissue)}", median_tpm: {t.median_tpm}}},\n')
+            w("\t\t]\n")
+
+        w("\t}\n")
 
-        lines.append(f"\t}}")
+    w("}\n")
 
-    lines.append("}")
-    lines.append("")  # trailing newline
 
-    return "\n".join(lines)
+def generate_cue(gtex_data: dict[str, GtexResult]) -> str:
+    """Generate CUE source from GTEx data, keyed by HGNC symbol."""
+    buf = io.StringIO()
+    write_cue(buf, gtex_data)
+    return buf.getvalue()
 
 
 def main():
@@ -248,35 +370,59 @@ def main():
     gtex_data = {}
     fetched = 0
 
-    for symbol in sorted(GENES.keys()):
+    to_fetch = []
+    for symbol in SORTED_SYMBOLS:
         if symbol in cache:
             entry = cache[symbol]
-            n_tissues = len(entry.get("top_tissues", []))
-            print(f"  {symbol}: cached (ensembl={entry['ensembl_id']}, {n_tissues} tissues)")
+            n_tissues = len(entry.top_tissues)
+            print(f"  {symbol}: cached (ensembl={entry.ensembl_id}, {n_tissues} tissues)")
             gtex_data[symbol] = entry
-            report.cached(symbol, f"ensembl={entry['ensembl_id']}")
-            continue
-
-        print(f"  {symbol}: querying...", end=" ", flush=True)
-        result = query_gene(symbol)
-        time.sleep(REQUEST_DELAY)
-
-        if result is None:
-            print("FAILED (no Ensembl ID)")
-            report.failed(symbol, "could not resolve Ensembl ID")
-            continue
-
-        n_tissues = len(result.get("top_tissues", []))
-        cranio = result["craniofacial_expression"]
-        print(f"ensembl={result['ensembl_id']}, {n_tissues} tissues, cranio={cranio}")
-
-        gtex_data[symbol] = result
-        cache[symbol] = result
-        report.ok(symbol, f"ensembl={result['ensembl_id']}, {n_tissues} tissues")
-        fetched += 1
+            report.cached(symbol, f"ensembl={entry.ensembl_id}")
+        else:
+            to_fetch.append(symbol)
+
+    # Query uncached genes concurrently: the work is network round trips,
+    # so overlapping them across a few workers hides most of the latency.
+    # Results are reported as they complete.
+    if to_fetch:
+        # Ensembl IDs resolved on earlier runs come from the sidecar; the
+        # rest are resolved up front in one request, and genes the batch
+        # misses fall back to a per-gene lookup inside query_gene
+        symbol_to_ensembl = load_ensembl_cache()
+        known = len(symbol_to_ensembl)
+        unresolved = [s for s in to_fetch if s not in symbol_to_ensembl]
+        if unresolved:
+            batch = resolve_ensembl_ids_batch(unresolved)
+            symbol_to_ensembl.update(batch)
+            print(f"  resolved {len(batch)}/{len(unresolved)} Ensembl IDs in one batch")
+
+        print(f"  querying {len(to_fetch)} genes...")
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = {pool.submit(query_gene, s, symbol_to_ensembl.get(s)): s
+                       for s in to_fetch}
+            for future in as_completed(futures):
+                symbol = futures[future]
+                result = future.result()
+                if result is None:
+                    print(f"  {symbol}: FAILED (no Ensembl ID)")
+                    report.failed(symbol, "could not resolve Ensembl ID")
+                    continue
+
+                n_tissues = len(result.top_tissues)
+                print(f"  {symbol}: ensembl={result.ensembl_id}, "
+                      f"{n_tissues} tissues, cranio={result.craniofacial_expression}")
+
+                gtex_data[symbol] = result
+                cache[symbol] = result
+                symbol_to_ensembl[symbol] = result.ensembl_id
+                report.ok(symbol, f"ensembl={result.ensembl_id}, {n_tissues} tissues")
+                fetched += 1
+
+        if len(symbol_to_ensembl) > known:
+            save_ensembl_cache(symbol_to_ensembl)
 
     # Save updated cache
-    save_cache(cache)
+    save_cache_if_dirty(save_cache, cache, fetched > 0, CACHE_FILE)
 
     if not gtex_data:
         print("ERROR: no GTEx data retrieved for any gene", file=sys.stderr)
@@ -284,10 +430,9 @@ def main():
 
     # Write CUE output
     print("from_gtex: writing model/gtex.cue...")
-    cue_source = generate_cue(gtex_data)
     OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
     with open(OUTPUT_FILE, "w") as f:
-        f.write(cue_source)
+        write_cue(f, gtex_data)
 
     print(f"from_gtex: wrote {OUTPUT_FILE}")
     print(report.summary())
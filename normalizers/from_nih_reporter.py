@@ -21,7 +21,7 @@ sys.path.insert(0, str(REPO_ROOT / "normalizers"))
 
 from genes import GENES
 from pipeline import PipelineReport, escape_cue_string
-from utils import post_json_with_retry
+from utils import post_json_with_retry, save_cache_if_dirty, write_atomic
 
 CACHE_DIR = REPO_ROOT / "data" / "nih_reporter"
 CACHE_FILE = CACHE_DIR / "nih_reporter_cache.json"
@@ -110,8 +110,7 @@ def load_cache() -> dict:
 def save_cache(cache: dict) -> None:
     """Persist the NIH Reporter cache to disk."""
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2, sort_keys=True)
+    write_atomic(CACHE_FILE, json.dumps(cache, indent=2, sort_keys=True).encode())
 
 
 def generate_cue(reporter_data: dict) -> str:
@@ -199,7 +198,7 @@ def main():
         fetched += 1
 
     # Save updated cache
-    save_cache(cache)
+    save_cache_if_dirty(save_cache, cache, fetched > 0, CACHE_FILE)
 
     if not reporter_data:
         print("ERROR: no NIH Reporter data retrieved for any gene", file=sys.stderr)
@@ -30,7 +30,7 @@ sys.path.insert(0, str(REPO_ROOT / "normalizers"))
 
 from genes import GENES
 from pipeline import PipelineReport, escape_cue_string
-from utils import fetch_with_retry
+from utils import fetch_with_retry, write_atomic
 
 CACHE_DIR = REPO_ROOT / "data" / "orphanet"
 CACHE_FILE = CACHE_DIR / "orphanet_cache.json"
@@ -112,8 +112,7 @@ def load_cache() -> dict:
 def save_cache(cache: dict) -> None:
     """Persist the Orphanet cache to disk."""
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2, sort_keys=True)
+    write_atomic(CACHE_FILE, json.dumps(cache, indent=2, sort_keys=True).encode())
     print(f"  cached: {CACHE_FILE}")
 
 
@@ -13,7 +13,6 @@ Usage:
 
 import json
 import sys
-import time
 import urllib.parse
 from pathlib import Path
 
@@ -21,7 +20,7 @@ REPO_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(REPO_ROOT / "normalizers"))
 
 from genes import GENES
-from utils import fetch_json_with_retry
+from utils import RateLimiter, fetch_json_many, save_cache_if_dirty, write_atomic
 
 CACHE_DIR = REPO_ROOT / "data" / "pubmed"
 CACHE_FILE = CACHE_DIR / "pubmed_cache.json"
@@ -55,67 +54,88 @@ ESUMMARY_URL = (
     "?db=pubmed&retmode=json&id={ids}"
 )
 
-REQUEST_DELAY = 0.35
+# NCBI E-utilities allow 3 requests/sec without an API key; the limiter is
+# shared by the fetch_json_many worker threads
+NCBI_LIMITER = RateLimiter(3.0)
+HEADERS = {"Accept": "application/json"}
 
 
-def fetch_json(url: str) -> dict | None:
-    try:
-        return fetch_json_with_retry(url, headers={"Accept": "application/json"})
-    except Exception as e:
-        print(f"  WARNING: request failed: {e}", file=sys.stderr)
-        return None
-
+def search_urls(symbol: str) -> list[str]:
+    """esearch URLs for a gene: total count, recent count, top 3 recent PMIDs."""
+    encoded_term = urllib.parse.quote(SEARCH_TERM.format(gene=symbol), safe="")
+    return [
+        ESEARCH_URL.format(term=encoded_term),
+        ESEARCH_RECENT_URL.format(term=encoded_term),
+        ESEARCH_TOP_URL.format(term=encoded_term),
+    ]
 
-def query_pubmed_gene(symbol: str) -> dict | None:
-    term = SEARCH_TERM.format(gene=symbol)
-    encoded_term = urllib.parse.quote(term, safe="")
 
-    # Total count
-    url = ESEARCH_URL.format(term=encoded_term)
-    data = fetch_json(url)
-    if data is None or "esearchresult" not in data:
-        return None
-    total = int(data["esearchresult"].get("count", 0))
-    time.sleep(REQUEST_DELAY)
+def fetch_many(urls: list[str]) -> list[dict | None]:
+    """Fetch URLs concurrently under NCBI_LIMITER; None for each failure."""
+    results = fetch_json_many(urls, headers=HEADERS, concurrency=3, limiter=NCBI_LIMITER)
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            print(f"  WARNING: request failed: {result}", file=sys.stderr)
+            results[i] = None
+    return results
 
-    # Recent count (last 5 years)
-    url = ESEARCH_RECENT_URL.format(term=encoded_term)
-    data = fetch_json(url)
-    recent = 0
-    if data and "esearchresult" in data:
-        recent = int(data["esearchresult"].get("count", 0))
-    time.sleep(REQUEST_DELAY)
 
-    # Top 3 recent papers
-    url = ESEARCH_TOP_URL.format(term=encoded_term)
-    data = fetch_json(url)
+def parse_papers(sdata: dict | None) -> list[dict]:
+    """Extract up to 3 {title, pmid, year} records from an esummary response."""
     papers = []
-    if data and "esearchresult" in data:
-        id_list = data["esearchresult"].get("idlist", [])
-        if id_list:
-            time.sleep(REQUEST_DELAY)
-            ids_param = ",".join(id_list[:3])
-            url = ESUMMARY_URL.format(ids=ids_param)
-            sdata = fetch_json(url)
-            if sdata and "result" in sdata:
-                for uid in sdata["result"].get("uids", [])[:3]:
-                    entry = sdata["result"].get(uid, {})
-                    title = entry.get("title", "")
-                    pubdate = entry.get("pubdate", "")
-                    year = 0
-                    if pubdate:
-                        try:
-                            year = int(pubdate[:4])
-                        except ValueError:
-                            pass
-                    if title:
-                        papers.append({
-                            "title": title,
-                            "pmid": uid,
-                            "year": year,
-                        })
-
-    return {"pubmed_total": total, "pubmed_recent": recent, "papers": papers}
+    if not sdata or "result" not in sdata:
+        return papers
+    for uid in sdata["result"].get("uids", [])[:3]:
+        entry = sdata["result"].get(uid, {})
+        title = entry.get("title", "")
+        pubdate = entry.get("pubdate", "")
+        year = 0
+        if pubdate:
+            try:
+                year = int(pubdate[:4])
+            except ValueError:
+                pass
+        if title:
+            papers.append({
+                "title": title,
+                "pmid": uid,
+                "year": year,
+            })
+    return papers
+
+
+def query_pubmed_genes(symbols: list[str]) -> dict[str, dict | None]:
+    """
+    Query PubMed for several genes. All esearch calls go out together, then
+    one esummary per gene with top papers; returns {symbol: result or None}.
+    """
+    searched = fetch_many([url for symbol in symbols for url in search_urls(symbol)])
+
+    top_ids = {}
+    for i, symbol in enumerate(symbols):
+        top = searched[3 * i + 2]
+        if top and "esearchresult" in top:
+            id_list = top["esearchresult"].get("idlist", [])
+            if id_list:
+                top_ids[symbol] = id_list[:3]
+    summaries = dict(zip(top_ids, fetch_many(
+        [ESUMMARY_URL.format(ids=",".join(ids)) for ids in top_ids.values()])))
+
+    results = {}
+    for i, symbol in enumerate(symbols):
+        total_data, recent_data, _ = searched[3 * i:3 * i + 3]
+        if total_data is None or "esearchresult" not in total_data:
+            results[symbol] = None
+            continue
+        recent = 0
+        if recent_data and "esearchresult" in recent_data:
+            recent = int(recent_data["esearchresult"].get("count", 0))
+        results[symbol] = {
+            "pubmed_total": int(total_data["esearchresult"].get("count", 0)),
+            "pubmed_recent": recent,
+            "papers": parse_papers(summaries.get(symbol)),
+        }
+    return results
 
 
 def load_cache() -> dict:
@@ -127,8 +147,7 @@ def load_cache() -> dict:
 
 def save_cache(cache: dict) -> None:
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2, sort_keys=True)
+    write_atomic(CACHE_FILE, json.dumps(cache, indent=2, sort_keys=True).encode())
 
 
 def escape_cue_string(s: str) -> str:
@@ -181,26 +200,27 @@ def main():
     pubmed_data = {}
     fetched = 0
 
+    to_fetch = []
     for symbol in sorted(GENES.keys()):
         if symbol in cache:
             print(f"  {symbol}: cached ({cache[symbol]['pubmed_total']} pubs)")
             pubmed_data[symbol] = cache[symbol]
-            continue
-
-        print(f"  {symbol}: querying PubMed...", end=" ", flush=True)
-        result = query_pubmed_gene(symbol)
-        time.sleep(REQUEST_DELAY)
-
-        if result is None:
-            print("FAILED")
-            continue
-
-        print(f"{result['pubmed_total']} total, {result['pubmed_recent']} recent")
-        pubmed_data[symbol] = result
-        cache[symbol] = result
-        fetched += 1
-
-    save_cache(cache)
+        else:
+            to_fetch.append(symbol)
+
+    if to_fetch:
+        print(f"  querying PubMed for {len(to_fetch)} genes...")
+        for symbol, result in query_pubmed_genes(to_fetch).items():
+            if result is None:
+                print(f"  {symbol}: FAILED")
+                continue
+            print(f"  {symbol}: {result['pubmed_total']} total, "
+                  f"{result['pubmed_recent']} recent")
+            pubmed_data[symbol] = result
+            cache[symbol] = result
+            fetched += 1
+
+    save_cache_if_dirty(save_cache, cache, fetched > 0, CACHE_FILE)
 
     cue_source = generate_cue(pubmed_data)
     OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
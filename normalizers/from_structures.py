@@ -24,7 +24,7 @@ sys.path.insert(0, str(REPO_ROOT / "normalizers"))
 
 from genes import GENES
 from pipeline import PipelineReport
-from utils import fetch_json_with_retry, post_json_with_retry
+from utils import fetch_json_with_retry, post_json_with_retry, save_cache_if_dirty, write_atomic
 
 CACHE_DIR = REPO_ROOT / "data" / "structures"
 CACHE_FILE = CACHE_DIR / "structures_cache.json"
@@ -125,8 +125,7 @@ def load_cache() -> dict:
 def save_cache(cache: dict) -> None:
     """Persist the structures cache to disk."""
     CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CACHE_FILE, "w") as f:
-        json.dump(cache, f, indent=2, sort_keys=True)
+    write_atomic(CACHE_FILE, json.dumps(cache, indent=2, sort_keys=True).encode())
     print(f"  cached: {CACHE_FILE}")
 
 
@@ -239,7 +238,7 @@ def main():
         fetched += 1
 
     # Save updated cache
-    save_cache(cache)
+    save_cache_if_dirty(save_cache, cache, fetched > 0, CACHE_FILE)
 
     if not structures_data:
         print("ERROR: no structure data retrieved for any gene", file=sys.stderr)
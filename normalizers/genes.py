@@ -181,10 +181,11 @@ ROLES = {
     ],
 }
 
+SORTED_SYMBOLS = tuple(sorted(GENES))
+
 SYMBOL_TO_ROLE = {}
 for role, symbols in ROLES.items():
-    for s in symbols:
-        SYMBOL_TO_ROLE[s] = role
+    SYMBOL_TO_ROLE.update(dict.fromkeys(symbols, role))
 
 # Reverse lookups
 NCBI_TO_SYMBOL = {v["ncbi"]: k for k, v in GENES.items()}
@@ -194,24 +195,21 @@ OMIM_TO_SYMBOL = {v["omim"]: k for k, v in GENES.items()}
 
 def gene_symbols() -> list[str]:
     """Return sorted list of all gene symbols."""
-    return sorted(GENES.keys())
+    return list(SORTED_SYMBOLS)
 
 
 def export_cue(output_path: str):
     """Export gene list as CUE for model self-description."""
-    lines = [
-        "package lacuene",
-        "",
-        "// Canonical gene list with HGNC symbols.",
-        "// Auto-generated from normalizers/genes.py -- do not hand-edit.",
-        f"// {len(GENES)} genes across {len(ROLES)} developmental roles.",
-        "",
-    ]
-    for symbol in sorted(GENES.keys()):
-        lines.append(f'genes: "{symbol}": symbol: "{symbol}"')
-    lines.append("")
     with open(output_path, "w") as f:
-        f.write("\n".join(lines))
+        w = f.write
+        w("package lacuene\n"
+          "\n"
+          "// Canonical gene list with HGNC symbols.\n"
+          "// Auto-generated from normalizers/genes.py -- do not hand-edit.\n"
+          f"// {len(GENES)} genes across {len(ROLES)} developmental roles.\n"
+          "\n")
+        for symbol in SORTED_SYMBOLS:
+            w(f'genes: "{symbol}": symbol: "{symbol}"\n')
     print(f"Exported {len(GENES)} genes to {output_path}")
 
 
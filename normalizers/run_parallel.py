@@ -2,13 +2,19 @@
 """Run all normalizers in parallel with staleness checking."""
 
 import argparse
-import subprocess
+import importlib
+import io
 import sys
+import threading
 import time
+import traceback
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "normalizers"))
+
+from utils import prewarm_hosts
 
 NORMALIZERS = [
     "from_go.py", "from_omim.py", "from_hpo.py", "from_uniprot.py",
@@ -19,6 +25,25 @@ NORMALIZERS = [
     "from_structures.py",
 ]
 
+# Normalizers run in-process as imported modules (no interpreter per script)
+NORMALIZER_MODULES = {name: name.removesuffix(".py") for name in NORMALIZERS}
+
+# Hosts each normalizer reaches through utils' shared session, warmed with
+# prewarm_hosts() before the normalizers start
+PREWARM_URLS = {
+    "from_clinvar.py": ["https://eutils.ncbi.nlm.nih.gov/"],
+    "from_pubmed.py": ["https://eutils.ncbi.nlm.nih.gov/"],
+    "from_gnomad.py": ["https://gnomad.broadinstitute.org/"],
+    "from_nih_reporter.py": ["https://api.reporter.nih.gov/"],
+    "from_gtex.py": ["https://gtexportal.org/", "https://mygene.info/"],
+    "from_clinicaltrials.py": ["https://clinicaltrials.gov/"],
+    "from_string.py": ["https://string-db.org/"],
+    "from_orphanet.py": ["http://www.orphadata.org/"],
+    "from_opentargets.py": ["https://api.platform.opentargets.org/"],
+    "from_models.py": ["https://api.ncbi.nlm.nih.gov/"],
+    "from_structures.py": ["https://alphafold.ebi.ac.uk/", "https://search.rcsb.org/"],
+}
+
 # Map normalizer to its cache file for staleness checking
 CACHE_FILES = {
     "from_go.py": None,  # no cache file, always run
@@ -51,16 +76,66 @@ def is_stale(normalizer: str, max_age_days: int) -> bool:
     return age > max_age_days * 86400
 
 
+FLUSH_EVERY = 4  # completed normalizers per status flush
+
+# A normalizer's output buffer lives on its Thread object (not a
+# threading.local) so that threads it starts can inherit it
+_thread_init = threading.Thread.__init__
+
+
+def _capture_buf() -> io.StringIO | None:
+    """Output buffer of the normalizer the current thread works for."""
+    return getattr(threading.current_thread(), "_capture_buf", None)
+
+
+def _inherit_capture(self, *args, **kwargs) -> None:
+    """Thread.__init__ while normalizers run: a new thread inherits its
+    creator's buffer, so a normalizer's own worker pools are captured too."""
+    _thread_init(self, *args, **kwargs)
+    self._capture_buf = _capture_buf()
+
+
+class _ThreadOutput(io.TextIOBase):
+    """
+    Stand-in for sys.stdout/sys.stderr while normalizers run in threads:
+    writes go to the current thread's capture buffer if it has one, else
+    to the real stream.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, s: str) -> int:
+        return (_capture_buf() or self._stream).write(s)
+
+    def flush(self) -> None:
+        if _capture_buf() is None:
+            self._stream.flush()
+
+
 def run_normalizer(name: str) -> tuple[str, int, str]:
     script = REPO_ROOT / "normalizers" / name
     if not script.exists():
         return name, -1, f"Script not found: {script}"
-    result = subprocess.run(
-        [sys.executable, str(script)],
-        capture_output=True, text=True, cwd=str(REPO_ROOT)
-    )
-    output = result.stdout + result.stderr
-    return name, result.returncode, output
+    buf = io.StringIO()
+    thread = threading.current_thread()
+    thread._capture_buf = buf
+    try:
+        module = importlib.import_module(NORMALIZER_MODULES[name])
+        module.main()
+        rc = 0
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            rc = e.code or 0
+        else:
+            print(e.code, file=sys.stderr)
+            rc = 1
+    except Exception:
+        traceback.print_exc()
+        rc = 1
+    finally:
+        thread._capture_buf = None
+    return name, rc, buf.getvalue()
 
 
 def main():
@@ -87,18 +162,34 @@ def main():
         return
 
     print(f"Running {len(to_run)} normalizers in parallel...")
+    prewarm_hosts([url for name in to_run for url in PREWARM_URLS.get(name, ())])
     failed = []
-    with ThreadPoolExecutor(max_workers=4) as pool:
-        futures = {pool.submit(run_normalizer, n): n for n in to_run}
-        for future in as_completed(futures):
-            name, rc, output = future.result()
-            status = "OK" if rc == 0 else "FAILED"
-            print(f"  [{status}] {name}")
-            if output.strip():
-                for line in output.strip().split("\n")[-3:]:
-                    print(f"    {line}")
-            if rc != 0:
-                failed.append(name)
+    # Status lines are buffered and flushed every FLUSH_EVERY completions
+    messages: list[str] = []
+    start = time.perf_counter()
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout, sys.stderr = _ThreadOutput(stdout), _ThreadOutput(stderr)
+    threading.Thread.__init__ = _inherit_capture
+    try:
+        # Normalizers are network-bound, so more workers than cores is fine
+        with ThreadPoolExecutor(max_workers=min(len(to_run), 8)) as pool:
+            futures = {pool.submit(run_normalizer, n): n for n in to_run}
+            for done, future in enumerate(as_completed(futures), 1):
+                name, rc, output = future.result()
+                status = "OK" if rc == 0 else "FAILED"
+                messages.append(f"  [{status}] {name}")
+                if output.strip():
+                    messages.extend(f"    {line}" for line in output.strip().split("\n")[-3:])
+                if rc != 0:
+                    failed.append(name)
+                if done % FLUSH_EVERY == 0 or done == len(futures):
+                    stdout.write("\n".join(messages) + "\n")
+                    stdout.flush()
+                    messages.clear()
+    finally:
+        threading.Thread.__init__ = _thread_init
+        sys.stdout, sys.stderr = stdout, stderr
+    print(f"  ({time.perf_counter() - start:.1f}s)")
 
     if failed:
         print(f"\n{len(failed)} normalizer(s) failed: {', '.join(failed)}")
@@ -2,25 +2,403 @@
 """
 Shared HTTP utilities for normalizer scripts.
 
-Provides fetch_with_retry and fetch_json_with_retry with exponential backoff,
-rate-limit awareness (Retry-After), and retries on transient server errors.
+Provides fetch_with_retry and fetch_json_with_retry with jittered
+exponential backoff, rate-limit awareness (Retry-After), and retries on
+transient server errors, fetch_json_many for fetching a batch of URLs
+concurrently, a thread-safe RateLimiter for normalizers that issue
+requests concurrently, and cache-file helpers (write_atomic,
+save_cache_if_dirty).
+
+Requests are also subject to a per-host AIMD concurrency limit with a
+circuit breaker (AIMDController) and a header-seeded sliding-window
+limiter (HOST_LIMITER).
 """
 
-import sys
+import atexit
+import json
+import logging
+import os
+import random
+import re
+import socket
+import threading
 import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from statistics import median
+from typing import Callable
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
 
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to stdlib json
+    orjson = None
 
-def fetch_with_retry(
+# Retry notices go through logging so callers can silence them by level.
+# With no handler configured, logging's last-resort handler still writes
+# WARNINGs to stderr, matching the previous print output.
+logger = logging.getLogger(__name__)
+
+# Shared keep-alive session: repeated requests to the same host reuse
+# pooled connections instead of a fresh TCP + TLS handshake each time.
+# Retries stay in the helpers below (to honour Retry-After), not urllib3.
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter whose sockets also enable TCP keepalive probes, so
+    pooled connections survive idle stretches between batches."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+            (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+        ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+_SESSION = requests.Session()
+_ADAPTER = _KeepAliveAdapter(pool_connections=16, pool_maxsize=64, max_retries=0)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+atexit.register(_SESSION.close)
+
+
+_BACKOFF_CAP = 60.0  # seconds; upper bound on a single backoff window
+
+
+def _sleep_backoff(
+    attempt: int,
+    max_retries: int,
+    backoff_base: float,
+    reason: str,
+    url: str,
+    wait: float | None = None,
+) -> None:
+    """
+    Log a retry and sleep before it. Unless the server gave a wait
+    (Retry-After), use "full jitter" backoff: a uniform draw from
+    [0, min(cap, base ** attempt)], so concurrent clients that failed
+    together do not all retry in lockstep.
+    """
+    if wait is None:
+        wait = random.uniform(0, min(_BACKOFF_CAP, backoff_base ** attempt))
+    logger.warning("  RETRY %d/%d: %s, waiting %.1fs -- %s",
+                   attempt + 1, max_retries, reason, wait, url)
+    time.sleep(wait)
+
+
+def _warm(url: str) -> None:
+    # Through _send like any other request, so the warm-up HEAD is counted
+    # by HOST_LIMITER and the host's AIMD controller
+    try:
+        _send(_SESSION, "HEAD", url).close()
+    except Exception:
+        pass  # best effort; the real request will connect normally
+
+
+def prewarm_hosts(urls: list[str]) -> None:
+    """
+    Open a pooled connection to each URL's host in background threads, so
+    DNS, TCP and TLS setup overlaps other startup work and the first real
+    request reuses a warm connection. Returns immediately.
+    """
+    roots = dict.fromkeys(f"{u.scheme}://{u.netloc}/" for u in map(urlsplit, urls))
+    for root in roots:
+        threading.Thread(target=_warm, args=(root,), daemon=True).start()
+
+
+class RateLimiter:
+    """
+    Thread-safe request pacer: spaces request starts at least 1/qps
+    seconds apart across all threads sharing the limiter.
+
+    Unlike a fixed sleep after every request, acquire() only waits for
+    whatever part of the interval has not already elapsed.
+    """
+
+    def __init__(self, qps: float):
+        self.min_interval = 1.0 / qps
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until the caller may issue its next request."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def write_atomic(path: Path, data: bytes) -> None:
+    """
+    Replace path with data atomically: write a sibling .tmp file, then
+    os.replace it over the target, so a crash mid-write never leaves a
+    truncated cache behind.
+    """
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def save_cache_if_dirty(
+    save_cache: Callable[[dict], None],
+    cache: dict,
+    dirty: bool,
+    cache_file: Path,
+) -> None:
+    """
+    Call save_cache(cache) only if the run added or changed entries.
+
+    An unchanged cache is not re-serialized; its mtime is still refreshed
+    so run_parallel's staleness check sees that the normalizer ran.
+    """
+    if dirty:
+        save_cache(cache)
+    elif cache_file.exists():
+        os.utime(cache_file)
+        print("  cache unchanged")
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of sending a request while a host's circuit is open."""
+
+
+class AIMDController:
+    """
+    Adaptive concurrency limit for one host, adjusted TCP-style: additive
+    increase (+alpha) after each healthy response, multiplicative decrease
+    (*beta) on 429/5xx, connection errors, or a response much slower than
+    the recent median. After failure_threshold consecutive failures the
+    circuit opens and requests fail fast for cooldown seconds.
+    """
+
+    def __init__(
+        self,
+        c_max: int = 64,
+        c_min: int = 1,
+        alpha: float = 0.5,
+        beta: float = 0.5,
+        window: int = 32,
+        slow_factor: float = 3.0,
+        failure_threshold: int = 10,
+        cooldown: float = 30.0,
+    ):
+        self.c = float(c_max)
+        self.c_max = c_max
+        self.c_min = c_min
+        self.alpha = alpha
+        self.beta = beta
+        self.slow_factor = slow_factor
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._latencies = deque(maxlen=window)
+        self._in_flight = 0
+        self._failures = 0
+        self._open_until = 0.0
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the host's concurrent request slots."""
+        with self._cond:
+            if time.monotonic() < self._open_until:
+                raise CircuitOpenError("circuit open after repeated failures")
+            while self._in_flight >= int(self.c):
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+
+    def on_success(self, latency: float) -> None:
+        with self._cond:
+            self._failures = 0
+            slow = (len(self._latencies) >= 8
+                    and latency > self.slow_factor * median(self._latencies))
+            self._latencies.append(latency)
+            if slow:
+                self.c = max(self.c_min, self.c * self.beta)
+            else:
+                self.c = min(self.c_max, self.c + self.alpha)
+                self._cond.notify_all()
+
+    def on_error(self) -> None:
+        with self._cond:
+            self.c = max(self.c_min, self.c * self.beta)
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._open_until = time.monotonic() + self.cooldown
+                self._failures = 0
+
+
+_controllers: dict[str, AIMDController] = {}
+_controllers_lock = threading.Lock()
+
+
+def _controller_for(url: str) -> AIMDController:
+    host = urlsplit(url).netloc
+    with _controllers_lock:
+        controller = _controllers.get(host)
+        if controller is None:
+            controller = _controllers[host] = AIMDController()
+        return controller
+
+
+class HostRateLimiter:
+    """
+    Proactive per-host sliding-window limiter. acquire() blocks until the
+    host has had fewer than its known limit of requests in the last window
+    seconds; update() learns that limit (and any Retry-After, or a nearly
+    exhausted quota) from response headers so later requests wait before
+    they are sent instead of after a 429.
+
+    Hosts with no rate-limit headers and no LIMITS entry are never
+    throttled. Window lengths follow the unit each API reports its limit
+    in: NCBI's X-RateLimit-Limit is per second, everything else is assumed
+    per minute.
+    """
+
+    WINDOWS = {"eutils.ncbi.nlm.nih.gov": 1.0}
+    DEFAULT_WINDOW = 60.0
+    # Known limits before any response is seen (NCBI without an API key)
+    LIMITS = {"eutils.ncbi.nlm.nih.gov": 3}
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamps: dict[str, deque] = {}
+        self._limits: dict[str, int] = dict(self.LIMITS)
+        self._blocked_until: dict[str, float] = {}
+
+    def _window(self, host: str) -> float:
+        return self.WINDOWS.get(host, self.DEFAULT_WINDOW)
+
+    def acquire(self, host: str) -> None:
+        window = self._window(host)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                stamps = self._stamps.setdefault(host, deque())
+                while stamps and now - stamps[0] >= window:
+                    stamps.popleft()
+                wait = self._blocked_until.get(host, 0.0) - now
+                limit = self._limits.get(host)
+                if wait <= 0:
+                    if limit is None or len(stamps) < limit:
+                        stamps.append(now)
+                        return
+                    wait = stamps[0] + window - now
+            time.sleep(wait)
+
+    def update(self, host: str, headers) -> None:
+        limit = _header_number(headers, "x-ratelimit-limit")
+        remaining = _header_number(
+            headers, "x-ratelimit-remaining", "x-ratelimit-remaining-requests"
+        )
+        retry_after = _retry_after_seconds(headers.get("retry-after"))
+        with self._lock:
+            if limit is not None and limit >= 1:
+                self._limits[host] = int(limit)
+            known = self._limits.get(host)
+            pause = 0.0
+            if retry_after is not None:
+                pause = retry_after
+            elif (remaining is not None and remaining <= 2
+                  and (known is None or remaining < 0.1 * known)):
+                pause = self._window(host)
+            if pause > 0:
+                until = time.monotonic() + min(pause, _BACKOFF_CAP)
+                if until > self._blocked_until.get(host, 0.0):
+                    self._blocked_until[host] = until
+
+
+def _header_number(headers, *names: str) -> float | None:
+    for name in names:
+        value = headers.get(name)
+        if value is not None:
+            try:
+                return float(value)
+            except ValueError:
+                pass
+    return None
+
+
+HOST_LIMITER = HostRateLimiter()
+
+
+def _send(session: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Issue one request inside its host's AIMD slot, after HOST_LIMITER
+    allows it, and feed the outcome (latency, or 429/5xx/connection
+    failure) back to the controller and the response headers back to
+    HOST_LIMITER.
+    """
+    host = urlsplit(url).netloc
+    controller = _controller_for(url)
+    HOST_LIMITER.acquire(host)
+    with controller.slot():
+        start = time.monotonic()
+        try:
+            resp = session.request(method, url, timeout=30, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            controller.on_error()
+            raise
+    HOST_LIMITER.update(host, resp.headers)
+    if resp.status_code == 429 or resp.status_code >= 500:
+        controller.on_error()
+    else:
+        controller.on_success(time.monotonic() - start)
+    return resp
+
+
+_NUM_RE = re.compile(r"^\s*\d+(?:\.\d+)?\s*$")
+
+
+def _retry_after_seconds(value: str | None) -> float | None:
+    """
+    Seconds to wait from a Retry-After header: either delay-seconds or
+    an HTTP-date, clamped to _BACKOFF_CAP. None when absent or unparseable.
+    """
+    if not value:
+        return None
+    if _NUM_RE.match(value):
+        return min(float(value), _BACKOFF_CAP)
+    try:
+        when = parsedate_to_datetime(value)
+    except (ValueError, TypeError):
+        return None
+    return min(max(0.0, when.timestamp() - time.time()), _BACKOFF_CAP)
+
+
+def _loads(data: bytes):
+    """Parse a JSON body straight from bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _request_with_retry(
+    method: str,
     url: str,
+    *,
     params: dict | None = None,
+    json_body: dict | None = None,
     headers: dict | None = None,
     max_retries: int = 3,
     backoff_base: float = 2.0,
+    session: requests.Session | None = None,
 ) -> requests.Response:
     """
-    HTTP GET with exponential backoff on transient failures.
+    Send one HTTP request with jittered exponential backoff on transient
+    failures.
 
     Retries on:
       - HTTP 429 (rate limit) -- respects Retry-After header if present
@@ -30,77 +408,59 @@ def fetch_with_retry(
     Raises immediately on:
       - HTTP 4xx (client errors) other than 429
 
+    Requests go through the shared module session unless another
+    requests.Session is passed.
+
     Returns the requests.Response on success.
     """
-    last_exc = None
+    session = session or _SESSION
 
     for attempt in range(max_retries + 1):
+        final = attempt >= max_retries
         try:
-            resp = requests.get(url, params=params, headers=headers, timeout=30)
-
-            if resp.status_code == 429:
-                if attempt >= max_retries:
-                    resp.raise_for_status()
-                retry_after = resp.headers.get("Retry-After")
-                if retry_after is not None:
-                    try:
-                        wait = float(retry_after)
-                    except (ValueError, TypeError):
-                        wait = backoff_base ** attempt
-                else:
-                    wait = backoff_base ** attempt
-                print(
-                    f"  RETRY {attempt + 1}/{max_retries}: 429 rate-limited, "
-                    f"waiting {wait:.1f}s -- {url}",
-                    file=sys.stderr,
-                )
-                time.sleep(wait)
-                continue
-
-            if 500 <= resp.status_code < 600:
-                if attempt >= max_retries:
-                    resp.raise_for_status()
-                wait = backoff_base ** attempt
-                print(
-                    f"  RETRY {attempt + 1}/{max_retries}: HTTP {resp.status_code}, "
-                    f"waiting {wait:.1f}s -- {url}",
-                    file=sys.stderr,
-                )
-                time.sleep(wait)
-                continue
-
-            # Non-retryable 4xx errors: raise immediately
+            resp = _send(session, method, url, params=params,
+                         json=json_body, headers=headers)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if final:
+                raise
+            reason = ("connection error"
+                      if isinstance(e, requests.exceptions.ConnectionError) else "timeout")
+            _sleep_backoff(attempt, max_retries, backoff_base, reason, url)
+            continue
+
+        status = resp.status_code
+        if status != 429 and not 500 <= status < 600:
+            # Success, or a non-retryable 4xx: raise immediately
             resp.raise_for_status()
             return resp
-
-        except requests.exceptions.ConnectionError as e:
-            last_exc = e
-            if attempt >= max_retries:
-                raise
-            wait = backoff_base ** attempt
-            print(
-                f"  RETRY {attempt + 1}/{max_retries}: connection error, "
-                f"waiting {wait:.1f}s -- {url}",
-                file=sys.stderr,
+        if final:
+            raise requests.HTTPError(
+                f"{status} {resp.reason} after {max_retries} retries for url: {url}",
+                response=resp,
             )
-            time.sleep(wait)
+        if status == 429:
+            # Server-directed wait takes precedence over jittered backoff
+            wait = _retry_after_seconds(resp.headers.get("Retry-After"))
+            _sleep_backoff(attempt, max_retries, backoff_base, "429 rate-limited", url, wait)
+        else:
+            _sleep_backoff(attempt, max_retries, backoff_base, f"HTTP {status}", url)
 
-        except requests.exceptions.Timeout as e:
-            last_exc = e
-            if attempt >= max_retries:
-                raise
-            wait = backoff_base ** attempt
-            print(
-                f"  RETRY {attempt + 1}/{max_retries}: timeout, "
-                f"waiting {wait:.1f}s -- {url}",
-                file=sys.stderr,
-            )
-            time.sleep(wait)
+    # Only reached when max_retries < 0
+    raise RuntimeError(f"{method} {url}: exhausted retries")
 
-    # Should not reach here, but just in case
-    if last_exc:
-        raise last_exc
-    raise RuntimeError(f"fetch_with_retry exhausted retries for {url}")
+
+def fetch_with_retry(
+    url: str,
+    params: dict | None = None,
+    headers: dict | None = None,
+    max_retries: int = 3,
+    backoff_base: float = 2.0,
+    session: requests.Session | None = None,
+) -> requests.Response:
+    """HTTP GET with retry; see _request_with_retry."""
+    return _request_with_retry("GET", url, params=params, headers=headers,
+                               max_retries=max_retries, backoff_base=backoff_base,
+                               session=session)
 
 
 def fetch_json_with_retry(
@@ -109,11 +469,12 @@ def fetch_json_with_retry(
     headers: dict | None = None,
     max_retries: int = 3,
     backoff_base: float = 2.0,
+    session: requests.Session | None = None,
 ) -> dict | list:
     """
     HTTP GET with retry, returning parsed JSON.
 
-    Calls fetch_with_retry and returns response.json().
+    Calls fetch_with_retry and parses response.content with _loads.
     """
     resp = fetch_with_retry(
         url,
@@ -121,8 +482,9 @@ def fetch_json_with_retry(
         headers=headers,
         max_retries=max_retries,
         backoff_base=backoff_base,
+        session=session,
     )
-    return resp.json()
+    return _loads(resp.content)
 
 
 def post_with_retry(
@@ -131,82 +493,12 @@ def post_with_retry(
     headers: dict | None = None,
     max_retries: int = 3,
     backoff_base: float = 2.0,
+    session: requests.Session | None = None,
 ) -> requests.Response:
-    """
-    HTTP POST with exponential backoff on transient failures.
-
-    Same retry semantics as fetch_with_retry but for POST requests
-    with a JSON body.
-    """
-    last_exc = None
-
-    for attempt in range(max_retries + 1):
-        try:
-            resp = requests.post(
-                url, json=json_body, headers=headers, timeout=30
-            )
-
-            if resp.status_code == 429:
-                if attempt >= max_retries:
-                    resp.raise_for_status()
-                retry_after = resp.headers.get("Retry-After")
-                if retry_after is not None:
-                    try:
-                        wait = float(retry_after)
-                    except (ValueError, TypeError):
-                        wait = backoff_base ** attempt
-                else:
-                    wait = backoff_base ** attempt
-                print(
-                    f"  RETRY {attempt + 1}/{max_retries}: 429 rate-limited, "
-                    f"waiting {wait:.1f}s -- {url}",
-                    file=sys.stderr,
-                )
-                time.sleep(wait)
-                continue
-
-            if 500 <= resp.status_code < 600:
-                if attempt >= max_retries:
-                    resp.raise_for_status()
-                wait = backoff_base ** attempt
-                print(
-                    f"  RETRY {attempt + 1}/{max_retries}: HTTP {resp.status_code}, "
-                    f"waiting {wait:.1f}s -- {url}",
-                    file=sys.stderr,
-                )
-                time.sleep(wait)
-                continue
-
-            resp.raise_for_status()
-            return resp
-
-        except requests.exceptions.ConnectionError as e:
-            last_exc = e
-            if attempt >= max_retries:
-                raise
-            wait = backoff_base ** attempt
-            print(
-                f"  RETRY {attempt + 1}/{max_retries}: connection error, "
-                f"waiting {wait:.1f}s -- {url}",
-                file=sys.stderr,
-            )
-            time.sleep(wait)
-
-        except requests.exceptions.Timeout as e:
-            last_exc = e
-            if attempt >= max_retries:
-                raise
-            wait = backoff_base ** attempt
-            print(
-                f"  RETRY {attempt + 1}/{max_retries}: timeout, "
-                f"waiting {wait:.1f}s -- {url}",
-                file=sys.stderr,
-            )
-            time.sleep(wait)
-
-    if last_exc:
-        raise last_exc
-    raise RuntimeError(f"post_with_retry exhausted retries for {url}")
+    """HTTP POST of a JSON body with retry; see _request_with_retry."""
+    return _request_with_retry("POST", url, json_body=json_body, headers=headers,
+                               max_retries=max_retries, backoff_base=backoff_base,
+                               session=session)
 
 
 def post_json_with_retry(
@@ -215,11 +507,12 @@ def post_json_with_retry(
     headers: dict | None = None,
     max_retries: int = 3,
     backoff_base: float = 2.0,
+    session: requests.Session | None = None,
 ) -> dict | list:
     """
     HTTP POST with retry, returning parsed JSON.
 
-    Calls post_with_retry and returns response.json().
+    Calls post_with_retry and parses response.content with _loads.
     """
     resp = post_with_retry(
         url,
@@ -227,5 +520,36 @@ def post_json_with_retry(
         headers=headers,
         max_retries=max_retries,
         backoff_base=backoff_base,
+        session=session,
     )
-    return resp.json()
+    return _loads(resp.content)
+
+
+def fetch_json_many(
+    urls: list[str],
+    *,
+    headers: dict | None = None,
+    concurrency: int = 8,
+    limiter: RateLimiter | None = None,
+    session: requests.Session | None = None,
+) -> list:
+    """
+    Fetch many URLs concurrently with fetch_json_with_retry.
+
+    Network waits overlap across up to `concurrency` worker threads sharing
+    the pooled session; pass a RateLimiter to cap the combined request rate.
+    Returns one entry per URL, in input order: the parsed JSON, or the
+    exception that fetching it raised (nothing is raised from here).
+    """
+    def fetch_one(url: str):
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fetch_json_with_retry(url, headers=headers, session=session)
+        except Exception as e:
+            return e
+
+    if not urls:
+        return []
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(urls))) as pool:
+        return list(pool.map(fetch_one, urls))
@@ -4,27 +4,63 @@
 import json
 import subprocess
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to stdlib json
+    orjson = None
+
 REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "normalizers"))  # for the utils unit tests
 TEST_GENES = ["SOX9", "IRF6", "PAX3", "RET", "MITF"]
+PROJECTIONS = (
+    "gene_sources", "gap_report", "enrichment", "genes",
+    "funding_gaps", "weighted_gaps", "anomalies",
+)
+
+
+@lru_cache(maxsize=1)
+def _load_all() -> dict:
+    """Export every projection the tests use with one `cue export` run."""
+    # Aliased as e0, e1, ... because {genes: genes} would refer to itself
+    wrapper = "{" + ", ".join(f"e{i}: {p}" for i, p in enumerate(PROJECTIONS)) + "}"
+    # Raw bytes straight into the parser: no str decode of the whole export
+    proc = subprocess.Popen(
+        ["cue", "export", "./model/", "-e", wrapper],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=str(REPO_ROOT)
+    )
+    out, err = proc.communicate()
+    assert proc.returncode == 0, f"cue export -e '{wrapper}' failed: {err.decode()}"
+    data = orjson.loads(out) if orjson is not None else json.loads(out)
+    return {p: data[f"e{i}"] for i, p in enumerate(PROJECTIONS)}
+
+
+_load_lock = threading.Lock()
 
 
 def cue_export(expr: str) -> dict:
-    result = subprocess.run(
-        ["cue", "export", "./model/", "-e", expr],
+    # Locked so tests started together in main() share one export
+    with _load_lock:
+        return _load_all()[expr]
+
+
+@lru_cache(maxsize=1)
+def _vet_model() -> subprocess.CompletedProcess:
+    """Run `cue vet` at most once per process, like _load_all's export."""
+    return subprocess.run(
+        ["cue", "vet", "-c", "./model/"],
         capture_output=True, text=True, cwd=str(REPO_ROOT)
     )
-    assert result.returncode == 0, f"cue export -e '{expr}' failed: {result.stderr}"
-    return json.loads(result.stdout)
 
 
 def test_model_validates():
     """CUE model passes validation."""
-    result = subprocess.run(
-        ["cue", "vet", "-c", "./model/"],
-        capture_output=True, text=True, cwd=str(REPO_ROOT)
-    )
+    result = _vet_model()
     assert result.returncode == 0, f"cue vet failed: {result.stderr}"
 
 
@@ -60,6 +96,11 @@ def test_gap_report():
     assert "total" in gap["summary"]
     assert gap["summary"]["total"] >= 5
     assert "research_gaps" in gap
+    missing = gap["summary"]["missing"]
+    assert len(missing) == 16
+    for source, count in missing.items():
+        assert isinstance(count, int) and count >= 0, source
+        assert count == len(gap[f"missing_{source}"]), source
 
 
 def test_enrichment():
@@ -113,8 +154,8 @@ def test_vizdata_structure():
     run_generator("generators/to_vizdata.py")
     vizdata_path = REPO_ROOT / "output" / "vizdata.json"
     assert vizdata_path.exists(), "output/vizdata.json not found"
-    with open(vizdata_path) as f:
-        vizdata = json.load(f)
+    raw = vizdata_path.read_bytes()
+    vizdata = orjson.loads(raw) if orjson is not None else json.loads(raw)
 
     # Top-level structure
     assert "nodes" in vizdata, "vizdata missing 'nodes'"
@@ -125,16 +166,18 @@ def test_vizdata_structure():
     # At least 90 nodes (95 genes in the pipeline)
     assert len(vizdata["nodes"]) >= 90, f"Expected >= 90 nodes, got {len(vizdata['nodes'])}"
 
-    # Each node has required data fields
-    for node in vizdata["nodes"]:
-        d = node.get("data", {})
-        assert "id" in d, f"Node missing data.id: {node}"
-        assert "label" in d, f"Node missing data.label: {node}"
-        assert "type" in d, f"Node missing data.type: {node}"
-        assert "color" in d, f"Node missing data.color: {node}"
+    # Each node has required data fields; report every offending node
+    required = frozenset({"id", "label", "type", "color"})
+    empty = {}
+    bad = []
+    for i, node in enumerate(vizdata["nodes"]):
+        missing = required - node.get("data", empty).keys()
+        if missing:
+            bad.append((i, sorted(missing)))
+    assert not bad, f"{len(bad)} nodes missing data fields (index, fields): {bad[:5]}"
 
     # At least 4 edge types present
-    edge_types = set(e["data"]["type"] for e in vizdata["edges"])
+    edge_types = {e["data"]["type"] for e in vizdata["edges"]}
     required_types = {"shared_phenotype", "shared_syndrome", "shared_pathway", "ppi"}
     missing = required_types - edge_types
     assert not missing, f"Missing edge types: {missing}"
@@ -185,6 +228,99 @@ def test_weighted_gaps_structure():
         assert score >= 0, f"{sym} has negative priority_score: {score}"
 
 
+class _FakeClock:
+    """Stands in for utils.time: monotonic() is frozen, sleep() advances it."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@contextmanager
+def _fake_clock():
+    import utils
+    clock = _FakeClock()
+    real_time, utils.time = utils.time, clock
+    try:
+        yield utils, clock
+    finally:
+        utils.time = real_time
+
+
+def test_aimd_controller():
+    """AIMD limit halves on errors, the breaker opens, then resets after cooldown."""
+    with _fake_clock() as (utils, clock):
+        ctl = utils.AIMDController(c_max=8, failure_threshold=3, cooldown=10.0)
+        ctl.on_error()  # e.g. a 429
+        assert ctl.c == 4.0
+        ctl.on_success(0.1)
+        assert ctl.c == 4.5
+        ctl.on_error()
+        ctl.on_error()
+        with ctl.slot():
+            pass  # two consecutive failures: still closed
+        ctl.on_error()
+        assert ctl.c == 1.0
+        try:
+            with ctl.slot():
+                pass
+            raise AssertionError("slot() did not raise while the circuit was open")
+        except utils.CircuitOpenError:
+            pass
+        clock.now += 10.0
+        with ctl.slot():
+            pass
+        ctl.on_success(0.1)
+        assert ctl.c == 1.5
+
+
+def test_host_rate_limiter():
+    """HostRateLimiter waits out a learned limit and a capped Retry-After."""
+    from requests.structures import CaseInsensitiveDict
+
+    with _fake_clock() as (utils, clock):
+        limiter = utils.HostRateLimiter()
+        host = "api.example.org"
+        limiter.acquire(host)
+        limiter.update(host, CaseInsensitiveDict({"X-RateLimit-Limit": "2"}))
+        limiter.acquire(host)
+        assert clock.sleeps == []
+        limiter.acquire(host)  # third request in the window
+        assert clock.sleeps == [limiter.DEFAULT_WINDOW]
+
+        limiter.update(host, CaseInsensitiveDict({"Retry-After": "5"}))
+        limiter.acquire(host)
+        assert clock.sleeps[-1] == 5.0
+
+        limiter.update(host, CaseInsensitiveDict({"Retry-After": "3600"}))
+        limiter.acquire(host)
+        assert clock.sleeps[-1] == utils._BACKOFF_CAP
+
+
+def _run_group(tests: list) -> list[str | None]:
+    """Run tests in order; None for a pass, else a FAIL/ERROR line."""
+    results = []
+    for test in tests:
+        try:
+            test()
+            results.append(None)
+        except AssertionError as e:
+            results.append(f"FAIL: {test.__name__}: {e}")
+        except Exception as e:
+            results.append(f"ERROR: {test.__name__}: {e}")
+    return results
+
+
 def main():
     tests = [
         test_model_validates,
@@ -199,19 +335,28 @@ def main():
         test_site_output_files,
         test_anomaly_projection,
         test_weighted_gaps_structure,
+        test_aimd_controller,
+        test_host_rate_limiter,
     ]
+    # Tests mostly wait on cue subprocesses, so they run concurrently. The
+    # generator tests share output/ (to_site reads to_vizdata's output), so
+    # they run in order within a single group.
+    generator_tests = [test_vizdata_structure, test_site_output_files]
+    groups = [[t] for t in tests if t not in generator_tests] + [generator_tests]
+    outcomes = {}
+    with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+        for group, results in zip(groups, pool.map(_run_group, groups)):
+            outcomes.update(zip(group, results))
+
     passed = 0
     failed = 0
     for test in tests:
-        try:
-            test()
+        error = outcomes[test]
+        if error is None:
             print(f"  PASS: {test.__name__}")
             passed += 1
-        except AssertionError as e:
-            print(f"  FAIL: {test.__name__}: {e}")
-            failed += 1
-        except Exception as e:
-            print(f"  ERROR: {test.__name__}: {e}")
+        else:
+            print(f"  {error}")
             failed += 1
 
     print(f"\n{passed} passed, {failed} failed")
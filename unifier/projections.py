@@ -27,6 +27,10 @@ def project_gene_sources(unified: dict) -> dict:
             "in_gtex": gene.get("_in_gtex", False),
             "in_clinicaltrials": gene.get("_in_clinicaltrials", False),
             "in_string": gene.get("_in_string", False),
+            "in_orphanet": gene.get("_in_orphanet", False),
+            "in_opentargets": gene.get("_in_opentargets", False),
+            "in_models": gene.get("_in_models", False),
+            "in_structures": gene.get("_in_structures", False),
         }
     return result
 
@@ -48,6 +52,10 @@ def project_enrichment(unified: dict) -> dict:
             "has_expression": gene.get("_in_gtex", False),
             "has_trials": gene.get("_in_clinicaltrials", False),
             "has_interactions": gene.get("_in_string", False),
+            "has_rare_disease": gene.get("_in_orphanet", False),
+            "has_drug_target": gene.get("_in_opentargets", False),
+            "has_animal_model": gene.get("_in_models", False),
+            "has_structure": gene.get("_in_structures", False),
         }
     return {"tiers": tiers}
 
@@ -69,6 +77,10 @@ def project_gap_report(unified: dict) -> dict:
     missing_gtex = [{"symbol": k} for k in sorted(genes) if not genes[k].get("_in_gtex", False)]
     missing_clinicaltrials = [{"symbol": k} for k in sorted(genes) if not genes[k].get("_in_clinicaltrials", False)]
     missing_string = [{"symbol": k} for k in sorted(genes) if not genes[k].get("_in_string", False)]
+    missing_orphanet = [{"symbol": k} for k in sorted(genes) if not genes[k].get("_in_orphanet", False)]
+    missing_opentargets = [{"symbol": k} for k in sorted(genes) if not genes[k].get("_in_opentargets", False)]
+    missing_models = [{"symbol": k} for k in sorted(genes) if not genes[k].get("_in_models", False)]
+    missing_structures = [{"symbol": k} for k in sorted(genes) if not genes[k].get("_in_structures", False)]
 
     # All-N lists
     all_five = sorted([
@@ -119,6 +131,28 @@ def project_gap_report(unified: dict) -> dict:
             "missing_gtex_count": len(missing_gtex),
             "missing_clinicaltrials_count": len(missing_clinicaltrials),
             "missing_string_count": len(missing_string),
+            "missing_orphanet_count": len(missing_orphanet),
+            "missing_opentargets_count": len(missing_opentargets),
+            "missing_models_count": len(missing_models),
+            "missing_structures_count": len(missing_structures),
+            "missing": {
+                "go": len(missing_go),
+                "omim": len(missing_omim),
+                "hpo": len(missing_hpo),
+                "uniprot": len(missing_uniprot),
+                "facebase": len(missing_facebase),
+                "clinvar": len(missing_clinvar),
+                "pubmed": len(missing_pubmed),
+                "gnomad": len(missing_gnomad),
+                "nih_reporter": len(missing_nih_reporter),
+                "gtex": len(missing_gtex),
+                "clinicaltrials": len(missing_clinicaltrials),
+                "string": len(missing_string),
+                "orphanet": len(missing_orphanet),
+                "opentargets": len(missing_opentargets),
+                "models": len(missing_models),
+                "structures": len(missing_structures),
+            },
         },
         "research_gaps": research_gaps,
         "missing_go": missing_go,
@@ -133,6 +167,10 @@ def project_gap_report(unified: dict) -> dict:
         "missing_gtex": missing_gtex,
         "missing_clinicaltrials": missing_clinicaltrials,
         "missing_string": missing_string,
+        "missing_orphanet": missing_orphanet,
+        "missing_opentargets": missing_opentargets,
+        "missing_models": missing_models,
+        "missing_structures": missing_structures,
     }
 
 